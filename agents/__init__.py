@@ -1,4 +1,30 @@
-from .base_agent import ReActAgent, GameState
+from .base_agent import (
+    ReActAgent,
+    GameState,
+    SessionContext,
+    session_context,
+    pending_inputs,
+    drop_pending_inputs,
+    set_input_provider,
+    reset_input_provider,
+    get_input_provider,
+)
+from .tracing import (
+    TraceSink,
+    set_trace_sink,
+    get_trace_sink,
+    mute_traces,
+    unmute_traces,
+    add_trace_arguments,
+    trace_sink_from_args,
+)
+from .shutdown import (
+    ShutdownRequested,
+    CancellationToken,
+    ShutdownCoordinator,
+    DrainReport,
+    shutdown_token,
+)
 from .supervisor_agent import SupervisorAgent
 from .number_game_agent import NumberGameAgent
 from .word_game_agent import WordGameAgent
@@ -7,6 +33,25 @@ from .command_agent import CommandAgent
 __all__ = [
     "ReActAgent",
     "GameState",
+    "SessionContext",
+    "session_context",
+    "pending_inputs",
+    "drop_pending_inputs",
+    "set_input_provider",
+    "reset_input_provider",
+    "get_input_provider",
+    "TraceSink",
+    "set_trace_sink",
+    "get_trace_sink",
+    "mute_traces",
+    "unmute_traces",
+    "add_trace_arguments",
+    "trace_sink_from_args",
+    "ShutdownRequested",
+    "CancellationToken",
+    "ShutdownCoordinator",
+    "DrainReport",
+    "shutdown_token",
     "SupervisorAgent",
     "NumberGameAgent",
     "WordGameAgent",
@@ -1,4 +1,46 @@
-from typing import TypedDict, Optional, Any, Dict
+import time
+from contextvars import ContextVar
+from typing import TypedDict, Optional, Any, Dict, Callable, List
+
+from .shutdown import shutdown_token
+from .tracing import get_trace_sink
+
+# Most recent think/act/observe entries kept per agent and session
+TRACE_LIMIT = 16
+
+# Fields a checkpoint records; a checkpoint is only taken when one changed
+CHECKPOINT_FIELDS = (
+    "session_id",
+    "number_games_played",
+    "word_games_played",
+    "number_wins",
+    "word_wins",
+    "current_game",
+)
+
+# Most recent requested checkpoint names kept per session
+CHECKPOINT_HISTORY_LIMIT = 256
+
+
+class AgentTrace(TypedDict):
+    thoughts: List[str]
+    actions: List[str]
+    observations: List[str]
+
+
+class SessionContext(TypedDict):
+    """Per-session agent data, carried in GameState so agents hold none"""
+
+    knowledge_base: List[Dict[str, str]]
+    traces: Dict[str, AgentTrace]
+    # Answers typed ahead on one line, waiting for the prompts they answer
+    pending_inputs: List[str]
+    # CHECKPOINT_FIELDS values at the last checkpoint
+    checkpoint_fingerprint: List[Any]
+    # Most recent checkpoint names requested, oldest first, taken or not
+    checkpoint_history: List[str]
+    # Names requested over the whole session (history keeps only the tail)
+    checkpoint_count: int
 
 
 class GameState(TypedDict):
@@ -14,42 +56,203 @@ class GameState(TypedDict):
     last_checkpoint: Optional[str]
     user_input: Optional[str]
     resumable: Optional[bool]
+    context: Optional[SessionContext]
+
+
+def session_context(state: GameState) -> SessionContext:
+    """The session's agent context, created on first use"""
+    context = state.get("context")
+    if context is None:
+        context = {"knowledge_base": [], "traces": {}, "pending_inputs": []}
+        state["context"] = context
+    return context
+
+
+def pending_inputs(state: GameState) -> List[str]:
+    """The session's queue of buffered answers, oldest first"""
+    return session_context(state).setdefault("pending_inputs", [])
+
+
+def drop_pending_inputs(state: GameState) -> None:
+    """Forget buffered answers once the game they were typed for is over"""
+    context = state.get("context")
+    if context and context.get("pending_inputs"):
+        context["pending_inputs"] = []
+
+
+def is_control_input(answer: str) -> bool:
+    """Whether answer leaves the current game (quit words and /commands)"""
+    return answer.lower() in ("quit", "q", "exit", "/exit") or answer.startswith("/")
+
+
+# Where agents read human input from. Unset means the terminal; the streaming
+# runtime installs a provider backed by LangGraph interrupts for each node run.
+_input_provider: ContextVar[Optional[Callable[[str], str]]] = ContextVar(
+    "input_provider", default=None
+)
+
+
+def set_input_provider(provider: Callable[[str], str]):
+    """Route agent input through provider for the current context"""
+    return _input_provider.set(provider)
+
+
+def reset_input_provider(token) -> None:
+    """Restore the input provider that was active before set_input_provider"""
+    _input_provider.reset(token)
+
+
+# State of the node run that took the last checkpoint in this context.
+# Node runs get their own state dict, so identity marks one super-step.
+_checkpoint_step: ContextVar[Optional[GameState]] = ContextVar(
+    "checkpoint_step", default=None
+)
+
+
+def get_input_provider() -> Callable[[str], str]:
+    """The input provider for the current context (the terminal if unset)"""
+    return _input_provider.get() or input
 
 
 class ReActAgent:
-    """Base ReAct agent with Think, Act, Observe pattern"""
+    """Base ReAct agent with Think, Act, Observe pattern
+
+    Agents keep no per-session data: traces and game knowledge live in the
+    session's context in GameState, so one set of agents can serve any
+    number of concurrent sessions.
+    """
 
     def __init__(self, name: str):
         self.name = name
-        self.thoughts = []
-        self.actions = []
-        self.observations = []
+
+    def trace(self, state: GameState) -> AgentTrace:
+        """This agent's recent reasoning trace for the session"""
+        return session_context(state)["traces"].setdefault(
+            self.name, {"thoughts": [], "actions": [], "observations": []}
+        )
+
+    def _record(self, state: GameState, kind: str, entry: str) -> None:
+        entries = self.trace(state)[kind]
+        entries.append(entry)
+        if len(entries) > TRACE_LIMIT:
+            del entries[:-TRACE_LIMIT]
+
+        sink = get_trace_sink()
+        if sink is not None:
+            sink.emit(
+                {
+                    "ts": time.time(),
+                    "session_id": state.get("session_id"),
+                    "agent": self.name,
+                    "kind": kind,
+                    "entry": entry,
+                }
+            )
 
     def think(self, state: GameState, context: str) -> str:
         """Reasoning step - analyze current situation"""
         thought = f"[{self.name} THINKING]: {context}"
-        self.thoughts.append(thought)
+        self._record(state, "thoughts", thought)
         return thought
 
     def act(self, state: GameState, action: str) -> str:
         """Acting step - take an action"""
         action_log = f"[{self.name} ACTING]: {action}"
-        self.actions.append(action_log)
+        self._record(state, "actions", action_log)
         return action_log
 
     def observe(self, state: GameState, observation: str) -> str:
         """Observing step - record what happened"""
         obs_log = f"[{self.name} OBSERVING]: {observation}"
-        self.observations.append(obs_log)
+        self._record(state, "observations", obs_log)
         return obs_log
 
+    def read_input(
+        self,
+        prompt: str,
+        state: GameState = None,
+        accept: Callable[[str], bool] = None,
+    ) -> str:
+        """Request a line of human input from the active input provider
+
+        Given the session state, input is pipelined: a line holding several
+        answers is split on whitespace, the first is returned and the rest
+        are queued in the session context, where the following prompts take
+        them without waiting on the player. accept validates a whole batch
+        at once; a batch with any invalid answer is not applied at all. A
+        line starting with '/' is one command with its arguments and is
+        never split.
+
+        Raises ShutdownRequested instead of waiting once shutdown has begun.
+        """
+        shutdown_token().raise_if_cancelled()
+        provider = get_input_provider()
+        if state is None:
+            return provider(prompt)
+
+        pending = pending_inputs(state)
+        if pending and accept:
+            rejected = [answer for answer in pending if not accept(answer)]
+            if rejected:
+                print(
+                    f"Discarding {len(pending)} buffered answer(s): "
+                    f"'{rejected[0]}' is not valid here."
+                )
+                pending.clear()
+        if pending:
+            answer = pending.pop(0)
+            print(f"{prompt}{answer}")
+            return answer
+
+        while True:
+            line = provider(prompt)
+            answers = line.split()
+            if len(answers) <= 1 or line.lstrip().startswith("/"):
+                return line
+            rejected = [answer for answer in answers if accept and not accept(answer)]
+            if rejected:
+                print(
+                    f"'{rejected[0]}' is not valid here; "
+                    "none of those answers were applied."
+                )
+                continue
+            pending.extend(answers[1:])
+            return answers[0]
+
     def create_checkpoint(
         self, state: GameState, checkpoint_name: str = None
     ) -> GameState:
-        """Create a checkpoint of current state"""
-        import time
+        """Create a checkpoint of current state
 
+        Dirty-tracked: checkpoint_data is not rebuilt when no
+        CHECKPOINT_FIELDS value changed since the last checkpoint, and
+        further calls during the same node run update that run's checkpoint
+        instead of taking another. Every call still names the latest
+        checkpoint (last_checkpoint) and is appended to the session's
+        checkpoint_history.
+        """
         checkpoint_name = checkpoint_name or f"checkpoint_{int(time.time())}"
+        context = session_context(state)
+        history = context.setdefault("checkpoint_history", [])
+        history.append(checkpoint_name)
+        del history[:-CHECKPOINT_HISTORY_LIMIT]
+        context["checkpoint_count"] = context.get("checkpoint_count", 0) + 1
+
+        state["last_checkpoint"] = checkpoint_name
+        state["resumable"] = True
+
+        fingerprint = [state.get(field) for field in CHECKPOINT_FIELDS]
+        previous = state.get("checkpoint_data") or {}
+        # Only data built here counts; a game may have stored its own since
+        if (
+            fingerprint == context.get("checkpoint_fingerprint")
+            and "timestamp" in previous
+        ):
+            # Nothing changed since the last checkpoint
+            return state
+        context["checkpoint_fingerprint"] = fingerprint
+
+        same_step = _checkpoint_step.get() is state and "timestamp" in previous
 
         # Store current state as checkpoint data
         checkpoint_data = {
@@ -59,14 +262,14 @@ class ReActAgent:
             "number_wins": state.get("number_wins", 0),
             "word_wins": state.get("word_wins", 0),
             "current_game": state.get("current_game"),
-            "timestamp": time.time(),
+            "timestamp": previous["timestamp"] if same_step else time.time(),
         }
 
         state["checkpoint_data"] = checkpoint_data
-        state["last_checkpoint"] = checkpoint_name
-        state["resumable"] = True
 
-        self.observe(state, f"Checkpoint '{checkpoint_name}' created")
+        if not same_step:
+            _checkpoint_step.set(state)
+            self.observe(state, f"Checkpoint '{checkpoint_name}' created")
         return state
 
     def can_resume(self, state: GameState) -> bool:
@@ -1,14 +1,23 @@
-import json
 import os
+from itertools import islice
 from typing import Dict, Any, Optional, List
+from storage import SessionStore, counters, shared_retention
 from .base_agent import ReActAgent, GameState
 
 
 class CommandAgent(ReActAgent):
     """Dedicated agent for interpreting user commands and managing interrupt/resume flows"""
 
-    def __init__(self):
+    # Commands that only report; they never change session state
+    READ_ONLY_COMMANDS = ("help", "status", "list")
+    # Commands that reach other sessions' saves, off when players share a store
+    # (/save <name> too: named saves are global to the server and pinned)
+    HOSTED_DISABLED = ("resume", "load", "list", "gc", "save")
+
+    def __init__(self, hosted: bool = False, checkpoint_dir: str = "checkpoints"):
         super().__init__("CommandAgent")
+        # Serving many players from one store (server mode)
+        self.hosted = hosted
         self.available_commands = {
             "resume": "Resume a previous game session",
             "switch": "Switch between different game types",
@@ -20,9 +29,21 @@ class CommandAgent(ReActAgent):
             "save": "Save current session with custom name",
             "load": "Load a saved session",
             "list": "List all saved sessions",
+            "gc": "Evict old saved sessions over the retention budget",
+            "rewind": "Restore a named checkpoint of this session (/rewind <name>)",
         }
-        self.checkpoint_dir = "checkpoints"
+        # Static, so rendered once rather than line by line on every /help
+        self.help_text = self._render_help()
+        self.checkpoint_dir = checkpoint_dir
         self._ensure_checkpoint_dir()
+        self.store = SessionStore(self.checkpoint_dir)
+        if self.store.has_flat_sessions():
+            self.store.start_migration()
+        self.page_size = 20
+        # One background retention pass per process, not one per agent
+        self.retention = shared_retention(self.store)
+        # NamedCheckpoints of the game graph, installed by create_game_system
+        self.checkpoints = None
 
     def _ensure_checkpoint_dir(self):
         """Ensure checkpoint directory exists"""
@@ -41,9 +62,9 @@ class CommandAgent(ReActAgent):
         # Clean and parse input
         input_clean = user_input.strip().lower()
 
-        # Check for structured commands
+        # Check for structured commands; arguments keep their case
         if input_clean.startswith("/") or input_clean in self.available_commands:
-            return self._handle_command(input_clean, state)
+            return self._handle_command(user_input.strip(), state)
 
         # Check for interrupt signals
         if input_clean in ["quit", "q", "stop", "interrupt", "ctrl+c"]:
@@ -56,14 +77,51 @@ class CommandAgent(ReActAgent):
         # Handle unexpected input
         return self._handle_unexpected_input(user_input, state)
 
+    def is_read_only(self, user_input: str) -> bool:
+        return user_input.strip().lower().lstrip("/") in self.READ_ONLY_COMMANDS
+
+    def answer_read_only(
+        self, user_input: str, state: GameState, interactive: bool = True
+    ) -> bool:
+        """Answer a read-only command directly, without routing through the graph
+
+        Returns False when user_input is not a read-only command, or when it
+        would need a follow-up prompt and interactive is False; the caller
+        then takes the normal command route.
+        """
+        if not self.is_read_only(user_input):
+            return False
+        cmd = user_input.strip().lower().lstrip("/")
+
+        if self._hosted_disabled(cmd, state):
+            return True
+
+        if cmd == "list" and not interactive:
+            # More than one page means a "-- more --" prompt
+            pages = self._session_pages()
+            next(pages, None)
+            if next(pages, None) is not None:
+                return False
+
+        if cmd == "help":
+            self._show_help(state)
+        elif cmd == "status":
+            self._show_status(state)
+        else:
+            self._list_sessions(state)
+        return True
+
     def _handle_command(self, command: str, state: GameState) -> GameState:
         """Handle structured commands"""
-        # Remove leading slash if present
-        cmd = command.lstrip("/")
+        # Remove leading slash if present; the rest of the line is the argument
+        cmd, _, arg = command.lstrip("/").partition(" ")
+        cmd, arg = cmd.lower(), arg.strip()
 
         action = self.act(state, f"Processing command: {cmd}")
 
-        if cmd == "resume":
+        if self._hosted_disabled(cmd, state):
+            return state
+        elif cmd == "resume":
             return self._resume_session(state)
         elif cmd == "switch":
             return self._switch_game(state)
@@ -76,11 +134,15 @@ class CommandAgent(ReActAgent):
         elif cmd == "clear":
             return self._clear_session(state)
         elif cmd == "save":
-            return self._save_session(state)
+            return self._save_session(state, name=arg)
         elif cmd == "load":
             return self._load_session(state)
         elif cmd == "list":
             return self._list_sessions(state)
+        elif cmd == "gc":
+            return self._collect_garbage(state)
+        elif cmd == "rewind":
+            return self._rewind(state, arg)
         elif cmd == "exit":
             return self._handle_interrupt(state)
         else:
@@ -88,6 +150,14 @@ class CommandAgent(ReActAgent):
             print(f"Unknown command: {cmd}. Type 'help' for available commands.")
             return state
 
+    def _hosted_disabled(self, cmd: str, state: GameState) -> bool:
+        """Refuse a command that would reach other players' saves"""
+        if not (self.hosted and cmd in self.HOSTED_DISABLED):
+            return False
+        observation = self.observe(state, f"Command {cmd} disabled in server mode")
+        print(f"/{cmd} is not available in server mode.")
+        return True
+
     def _handle_interrupt(self, state: GameState) -> GameState:
         """Handle session interruption with save option"""
         action = self.act(state, "Processing interrupt signal - offering save options")
@@ -97,7 +167,7 @@ class CommandAgent(ReActAgent):
         print("2. Exit without saving")
         print("3. Continue playing")
 
-        choice = input("Choose (1-3): ").strip()
+        choice = self.read_input("Choose (1-3): ").strip()
 
         if choice == "1":
             self._save_session(state, auto_name=True)
@@ -123,9 +193,11 @@ class CommandAgent(ReActAgent):
         elif choice == "1":
             state["action"] = "number_game"
             state["number_games_played"] = state.get("number_games_played", 0) + 1
+            counters().add("number_games_started")
         elif choice == "2":
             state["action"] = "word_game"
             state["word_games_played"] = state.get("word_games_played", 0) + 1
+            counters().add("word_games_started")
 
         observation = self.observe(
             state, f"Game choice processed, action set to: {state['action']}"
@@ -144,21 +216,18 @@ class CommandAgent(ReActAgent):
     def _resume_session(self, state: GameState) -> GameState:
         """Resume the most recent session"""
         try:
-            checkpoint_files = [
-                f for f in os.listdir(self.checkpoint_dir) if f.endswith(".json")
-            ]
-            if not checkpoint_files:
+            # Get most recent checkpoint, streaming over the catalog
+            latest = max(
+                self.store.entries(), key=lambda entry: entry[1].st_mtime, default=None
+            )
+            if latest is None:
                 print("No saved sessions found.")
                 return state
 
-            # Get most recent checkpoint
-            latest_file = max(
-                checkpoint_files,
-                key=lambda f: os.path.getctime(os.path.join(self.checkpoint_dir, f)),
-            )
+            latest, _ = latest
+            latest_file = f"{latest}.json"
 
-            with open(os.path.join(self.checkpoint_dir, latest_file), "r") as f:
-                saved_state = json.load(f)
+            saved_state = self.store.load(latest)
 
             state.update(saved_state)
             state["action"] = "menu"
@@ -191,60 +260,86 @@ class CommandAgent(ReActAgent):
         """Pause and save current session"""
         return self._save_session(state, auto_name=True)
 
-    def _save_session(self, state: GameState, auto_name: bool = False) -> GameState:
-        """Save current session state"""
-        try:
-            if auto_name:
-                filename = f"session_{state.get('session_id', 'unknown')}.json"
-            else:
-                name = input("Enter save name (or press Enter for auto-name): ").strip()
-                filename = (
-                    f"{name}.json"
-                    if name
-                    else f"session_{state.get('session_id', 'unknown')}.json"
-                )
+    def _save_session(
+        self, state: GameState, auto_name: bool = False, name: str = ""
+    ) -> GameState:
+        """Save current session state, as name when given (/save <name>)"""
+        # Prompt outside the try block: under the streaming runtime a pending
+        # input is a graph interrupt, which must not be reported as a failure
+        if not auto_name and not name:
+            name = self.read_input(
+                "Enter save name (or press Enter for auto-name): "
+            ).strip()
 
-            filepath = os.path.join(self.checkpoint_dir, filename)
+        try:
+            name = name or f"session_{state.get('session_id', 'unknown')}"
+            filename = f"{name}.json"
 
             # Create a clean state copy for saving
-            save_state = {k: v for k, v in state.items() if k != "action"}
+            save_state = {
+                k: v for k, v in state.items() if k not in ("action", "context")
+            }
             save_state["saved_at"] = str(state.get("session_id", "unknown"))
 
-            print(f"Saving session to {filepath}")
-            with open(filepath, "w") as f:
-                json.dump(save_state, f, indent=2)
+            if not self.hosted:
+                # Server paths are not for remote players
+                print(f"Saving session to {self.store.path(name)}")
+            self.store.save(name, save_state)
+            self.retention.poke()
 
             observation = self.observe(state, f"Session saved as {filename}")
             print(f"Session saved as {filename}")
 
         except Exception as e:
             observation = self.observe(state, f"Failed to save session: {e}")
-            print(f"Failed to save session: {e}")
+            print(
+                "Failed to save session."
+                if self.hosted
+                else f"Failed to save session: {e}"
+            )
 
         return state
 
+    def _session_pages(self):
+        """Saved sessions as lazily read pages of (name, stat)"""
+        entries = self.store.entries()
+        while True:
+            page = list(islice(entries, self.page_size))
+            if not page:
+                return
+            yield page
+
     def _load_session(self, state: GameState) -> GameState:
         """Load a specific session"""
+        # OSError/ValueError only: a pending streamed prompt must propagate
         try:
-            checkpoint_files = [
-                f for f in os.listdir(self.checkpoint_dir) if f.endswith(".json")
-            ]
-            if not checkpoint_files:
+            pages = self._session_pages()
+            page = next(pages, None)
+            if page is None:
                 print("No saved sessions found.")
                 return state
 
             print("Available sessions:")
-            for i, filename in enumerate(checkpoint_files, 1):
-                print(f"{i}. {filename}")
-
-            choice = input("Enter session number to load: ").strip()
+            shown = []
+            while True:
+                for name, _ in page:
+                    shown.append(name)
+                    print(f"{len(shown)}. {name}.json")
+
+                following = next(pages, None)
+                more = " (Enter for more)" if following else ""
+                choice = self.read_input(
+                    f"Enter session number to load{more}: "
+                ).strip()
+                if choice or following is None:
+                    break
+                page = following
 
             if choice.isdigit():
                 idx = int(choice) - 1
-                if 0 <= idx < len(checkpoint_files):
-                    filename = checkpoint_files[idx]
-                    with open(os.path.join(self.checkpoint_dir, filename), "r") as f:
-                        saved_state = json.load(f)
+                if 0 <= idx < len(shown):
+                    filename = f"{shown[idx]}.json"
+                    saved_state = self.store.load(shown[idx])
 
                     state.update(saved_state)
                     state["action"] = "menu"
@@ -256,54 +351,156 @@ class CommandAgent(ReActAgent):
             else:
                 print("Invalid input.")
 
-        except Exception as e:
+        except (OSError, ValueError) as e:
             observation = self.observe(state, f"Failed to load session: {e}")
             print(f"Failed to load session: {e}")
 
         return state
 
     def _list_sessions(self, state: GameState) -> GameState:
-        """List all saved sessions"""
+        """List all saved sessions, one page at a time"""
         try:
-            checkpoint_files = [
-                f for f in os.listdir(self.checkpoint_dir) if f.endswith(".json")
-            ]
-            if not checkpoint_files:
+            pages = self._session_pages()
+            page = next(pages, None)
+            if page is None:
                 print("No saved sessions found.")
             else:
                 print("Saved sessions:")
-                for filename in checkpoint_files:
-                    filepath = os.path.join(self.checkpoint_dir, filename)
-                    mod_time = os.path.getmtime(filepath)
-                    print(f"  - {filename} (modified: {mod_time})")
-        except Exception as e:
+                while page:
+                    for name, st in page:
+                        print(f"  - {name}.json (modified: {st.st_mtime})")
+                    page = next(pages, None)
+                    if page:
+                        more = self.read_input(
+                            "-- more -- (Enter to continue, q to stop): "
+                        )
+                        if more.strip().lower() == "q":
+                            break
+        except OSError as e:
             print(f"Error listing sessions: {e}")
 
         observation = self.observe(state, "Listed saved sessions")
         return state
 
+    def _collect_garbage(self, state: GameState) -> GameState:
+        """Show a dry-run retention report and evict on confirmation"""
+        policy = self.retention.policy
+        report = self.retention.collect(dry_run=True)
+        print("\nRetention report (dry run):")
+        for line in report.lines(policy):
+            print(line)
+
+        if not policy.enabled:
+            print(
+                "No retention budget configured "
+                "(set CHECKPOINT_MAX_BYTES or CHECKPOINT_MAX_SESSIONS)."
+            )
+
+        if not report.evicted and not report.stale_temp_files:
+            observation = self.observe(state, "Retention pass: nothing to collect")
+            print("Nothing to collect.")
+            return state
+
+        confirm = self.read_input("Proceed with eviction? (y/N): ").strip().lower()
+        if confirm == "y":
+            report = self.retention.collect()
+            for line in report.lines(policy):
+                print(line)
+            observation = self.observe(
+                state, f"Evicted {len(report.evicted)} saved session(s)"
+            )
+        else:
+            observation = self.observe(state, "Retention pass cancelled")
+            print("Collection cancelled.")
+
+        return state
+
+    def _rewind(self, state: GameState, name: str = "") -> GameState:
+        """Restore the session to a named checkpoint taken earlier"""
+        if self.checkpoints is None:
+            print("Rewind is not available in this session.")
+            return state
+
+        if not name:
+            names = self.checkpoints.names()
+            if not names:
+                print("No checkpoints to rewind to yet.")
+                return state
+            print("Checkpoints (oldest first):")
+            for checkpoint in names[-self.page_size :]:
+                print(f"  - {checkpoint}")
+            name = self.read_input(
+                "Rewind to checkpoint (Enter to cancel): ", state
+            ).strip()
+            if not name:
+                print("Rewind cancelled.")
+                return state
+
+        values = self.checkpoints.load(name)
+        if values is None:
+            observation = self.observe(state, f"No checkpoint named '{name}'")
+            print(f"No checkpoint named '{name}'. Type '/rewind' to list them.")
+            return state
+
+        # The session context (traces, checkpoint history) carries on as is
+        kept = ("action", "user_input", "interrupted", "context")
+        for key in state:
+            if key not in kept and key not in values:
+                state[key] = None
+        state.update({k: v for k, v in values.items() if k not in kept})
+        state["action"] = "menu"
+
+        observation = self.observe(state, f"Rewound to checkpoint '{name}'")
+        print(f"Rewound to checkpoint '{name}'.")
+        return state
+
+    def _render_help(self) -> str:
+        lines = ["\nAvailable commands:"]
+        lines += [
+            f"  /{cmd} - {desc}"
+            for cmd, desc in self.available_commands.items()
+            if not (self.hosted and cmd in self.HOSTED_DISABLED)
+        ]
+        lines += [
+            "\nYou can also use standard game choices:",
+            "  1 - Number Game",
+            "  2 - Word Game",
+            "  (blank) - Exit",
+        ]
+        return "\n".join(lines)
+
     def _show_help(self, state: GameState) -> GameState:
         """Show available commands"""
-        print("\nAvailable commands:")
-        for cmd, desc in self.available_commands.items():
-            print(f"  /{cmd} - {desc}")
-        print("\nYou can also use standard game choices:")
-        print("  1 - Number Game")
-        print("  2 - Word Game")
-        print("  (blank) - Exit")
+        print(self.help_text)
 
         observation = self.observe(state, "Displayed help information")
         return state
 
     def _show_status(self, state: GameState) -> GameState:
         """Show current session status"""
-        print("\nCurrent Session Status:")
-        print(f"Session ID: {state.get('session_id', 'N/A')}")
-        print(f"Number Games Played: {state.get('number_games_played', 0)}")
-        print(f"Word Games Played: {state.get('word_games_played', 0)}")
-        print(f"Number Game Wins: {state.get('number_wins', 0)}")
-        print(f"Word Game Wins: {state.get('word_wins', 0)}")
-        print(f"Current Action: {state.get('action', 'Unknown')}")
+        # Totals across every worker process, read from shared memory
+        totals = counters().snapshot()
+        print(
+            "\n".join(
+                [
+                    "\nCurrent Session Status:",
+                    f"Session ID: {state.get('session_id', 'N/A')}",
+                    f"Number Games Played: {state.get('number_games_played', 0)}",
+                    f"Word Games Played: {state.get('word_games_played', 0)}",
+                    f"Number Game Wins: {state.get('number_wins', 0)}",
+                    f"Word Game Wins: {state.get('word_wins', 0)}",
+                    f"Current Action: {state.get('action', 'Unknown')}",
+                    "\nGlobal Stats:",
+                    f"Players Connected: {totals['sessions_connected']}",
+                    f"Games In Progress: {totals['games_in_progress']}",
+                    f"Games Started: {totals['number_games_started']} number, "
+                    f"{totals['word_games_started']} word",
+                    f"Wins: {totals['number_wins']} number, {totals['word_wins']} word",
+                    f"Checkpoints Written: {totals['checkpoints_written']}",
+                    f"Sessions Saved: {totals['sessions_saved']}",
+                ]
+            )
+        )
 
         observation = self.observe(state, "Displayed session status")
         return state
@@ -311,7 +508,9 @@ class CommandAgent(ReActAgent):
     def _clear_session(self, state: GameState) -> GameState:
         """Clear current session stats"""
         confirm = (
-            input("Are you sure you want to clear the current session? (y/N): ")
+            self.read_input(
+                "Are you sure you want to clear the current session? (y/N): "
+            )
             .strip()
             .lower()
         )
@@ -1,4 +1,5 @@
-from .base_agent import ReActAgent, GameState
+from storage import counters
+from .base_agent import ReActAgent, GameState, is_control_input, pending_inputs
 
 
 class NumberGameAgent(ReActAgent):
@@ -10,7 +11,7 @@ class NumberGameAgent(ReActAgent):
     def _get_input_with_interrupt_check(self, prompt: str, state: GameState) -> tuple:
         """Get user input with interrupt and command handling"""
         try:
-            user_input = input(prompt).strip()
+            user_input = self.read_input(prompt, state, self._accepts).strip()
 
             # Check for interrupt signals
             if user_input.lower() in ["quit", "q", "exit", "/exit"]:
@@ -25,6 +26,10 @@ class NumberGameAgent(ReActAgent):
         except (KeyboardInterrupt, EOFError):
             return "interrupt", True
 
+    @staticmethod
+    def _accepts(answer: str) -> bool:
+        return answer.lower() in ("yes", "higher", "lower") or is_control_input(answer)
+
     def play(self, state: GameState) -> GameState:
         # THINK: Initialize game strategy
         thought = self.think(
@@ -76,7 +81,7 @@ class NumberGameAgent(ReActAgent):
                 if response == "interrupt":
                     state["action"] = "interrupt"
                     state["interrupted"] = True
-                elif response.startswith("/"):
+                elif response.startswith("/") and response.lower() != "/exit":
                     state["action"] = "command"
                     state["user_input"] = response
                 else:
@@ -93,6 +98,7 @@ class NumberGameAgent(ReActAgent):
                 )
                 print("Correct! You guessed it.")
                 state["number_wins"] = state.get("number_wins", 0) + 1
+                counters().add("number_wins")
                 print(f"Number Game Wins: {state.get('number_wins', 0)}")
                 break
             elif response == "higher":
@@ -102,7 +108,10 @@ class NumberGameAgent(ReActAgent):
                 )
                 min_num = guess + 1
 
-                # Create checkpoint after range adjustment
+                # Create checkpoint after range adjustment, once per batch
+                # when answers were sent ahead
+                if pending_inputs(state):
+                    continue
                 checkpoint_data = {
                     "min_num": min_num,
                     "max_num": max_num,
@@ -119,7 +128,10 @@ class NumberGameAgent(ReActAgent):
                 )
                 max_num = guess - 1
 
-                # Create checkpoint after range adjustment
+                # Create checkpoint after range adjustment, once per batch
+                # when answers were sent ahead
+                if pending_inputs(state):
+                    continue
                 checkpoint_data = {
                     "min_num": min_num,
                     "max_num": max_num,
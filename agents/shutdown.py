@@ -0,0 +1,134 @@
+"""Cooperative cancellation and bounded-time draining for process shutdown
+
+A ShutdownCoordinator owns the process's CancellationToken. Once shutdown
+is requested (normally by SIGTERM), every graph node and every input wait
+checks the token and raises ShutdownRequested instead of starting work or
+blocking on a player, so the game unwinds within one step. The coordinator
+then runs its registered drain steps (saving sessions, flushing journals
+and trace files) in order against a single deadline and reports what was
+saved, what failed and what was not reached in time.
+"""
+
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+
+class ShutdownRequested(BaseException):
+    """Raised at a node boundary or input wait once shutdown has begun
+
+    A BaseException, like KeyboardInterrupt, so the broad `except
+    Exception` handlers around saves and loads do not swallow it.
+    """
+
+
+class CancellationToken:
+    """Process-wide flag that shutdown has been requested"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "shutdown") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise ShutdownRequested(self.reason)
+
+
+_token = CancellationToken()
+
+
+def shutdown_token() -> CancellationToken:
+    """The token every node and input wait in this process checks"""
+    return _token
+
+
+@dataclass
+class DrainReport:
+    """What a drain saved before its deadline"""
+
+    saved: List[str] = field(default_factory=list)
+    # (step, error)
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    # Steps not started before the deadline
+    abandoned: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def lines(self) -> List[str]:
+        lines = [
+            f"Shutdown drained in {self.elapsed:.2f}s: {len(self.saved)} saved, "
+            f"{len(self.failed)} failed, {len(self.abandoned)} abandoned"
+        ]
+        lines += [f"  saved: {name}" for name in self.saved]
+        lines += [f"  failed: {name} ({error})" for name, error in self.failed]
+        lines += [f"  abandoned: {name}" for name in self.abandoned]
+        return lines
+
+
+class ShutdownCoordinator:
+    """Cancels the token and runs drain steps within one deadline
+
+    Steps are (name, fn) pairs run in registration order; fn receives the
+    seconds left and returns True once its work is saved (False or an
+    exception counts as a failure). Steps still waiting when the deadline
+    passes are abandoned.
+    """
+
+    def __init__(self, timeout: float = 10.0, token: CancellationToken = None):
+        self.timeout = timeout
+        self.token = token or shutdown_token()
+        self._steps: List[Tuple[str, Callable[[float], bool]]] = []
+
+    def add_step(self, name: str, fn: Callable[[float], bool]) -> None:
+        self._steps.append((name, fn))
+
+    def request(self, reason: str = "shutdown") -> None:
+        self.token.cancel(reason)
+
+    def install_signal_handlers(self, signals=(signal.SIGTERM,)) -> None:
+        """Request shutdown on signals and break out of the current wait
+
+        The first signal raises ShutdownRequested in the main thread, which
+        also ends a blocking input() call; repeats during the drain are
+        ignored so they cannot cut it short.
+        """
+
+        def handler(signum, frame):
+            if self.token.cancelled:
+                return
+            self.request(f"signal {signum}")
+            raise ShutdownRequested(self.token.reason)
+
+        for signum in signals:
+            signal.signal(signum, handler)
+
+    def drain(self) -> DrainReport:
+        """Run every drain step, stopping at the deadline"""
+        self.request()
+        started = time.monotonic()
+        deadline = started + self.timeout
+        report = DrainReport()
+        for name, fn in self._steps:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                report.abandoned.append(name)
+                continue
+            try:
+                if fn(remaining):
+                    report.saved.append(name)
+                else:
+                    report.failed.append((name, "not saved"))
+            except Exception as e:
+                report.failed.append((name, str(e) or type(e).__name__))
+        report.elapsed = time.monotonic() - started
+        return report
@@ -1,11 +1,41 @@
+from storage import counters
 from .base_agent import ReActAgent, GameState
+from .command_agent import CommandAgent
 
 
 class SupervisorAgent(ReActAgent):
     """Manages game flow and stats using ReAct pattern"""
 
-    def __init__(self):
+    MENU_PROMPT = "Choice: "
+    # Rendered once; display_menu prints it with the stats as one block
+    MENU_TEXT = (
+        "\nChoose a game:\n"
+        "1. Number Game\n"
+        "2. Word Game\n"
+        "Type '/help' for commands or leave blank to exit"
+    )
+    # Bare words the menu routes to the CommandAgent like their /commands
+    COMMAND_WORDS = (
+        "help",
+        "status",
+        "save",
+        "load",
+        "pause",
+        "resume",
+        "switch",
+        "clear",
+        "list",
+        "gc",
+        "rewind",
+    )
+
+    def __init__(self, command_agent: CommandAgent = None):
         super().__init__("SupervisorAgent")
+        # Answers read-only commands in place at the menu prompt
+        self.command_agent = command_agent
+
+    def _is_command(self, choice: str) -> bool:
+        return choice.startswith("/") or choice.lower() in self.COMMAND_WORDS
 
     def display_menu(self, state: GameState) -> GameState:
         # THINK: Analyze current session state
@@ -22,34 +52,51 @@ class SupervisorAgent(ReActAgent):
         # ACT: Display current session stats and menu
         action = self.act(state, "Displaying current session stats and game menu")
 
+        lines = []
         # Show current session stats if any games have been played
         if games_played > 0:
-            print(f"\nCurrent Session Stats:")
-            print(f"Word Game Wins: {state.get('word_wins', 0)}")
-            print(f"Number Game Wins: {state.get('number_wins', 0)}")
+            lines += [
+                "\nCurrent Session Stats:",
+                f"Word Game Wins: {state.get('word_wins', 0)}",
+                f"Number Game Wins: {state.get('number_wins', 0)}",
+            ]
 
         # Show resume option if resumable
         if state.get("resumable", False):
-            print(
+            lines.append(
                 f"\n[Session is resumable from: {state.get('last_checkpoint', 'unknown')}]"
             )
 
-        print("\nChoose a game:")
-        print("1. Number Game")
-        print("2. Word Game")
-        print("Type '/help' for commands or leave blank to exit")
-
-        try:
-            choice = input("Choice: ").strip()
-        except (KeyboardInterrupt, EOFError):
-            # Handle Ctrl+C or EOF gracefully
-            print("\n\nInterrupt detected...")
-            state["action"] = "interrupt"
-            state["interrupted"] = True
-            return state
-
-        # Create a checkpoint before processing choice
-        state = self.create_checkpoint(state, f"menu_choice_{choice or 'exit'}")
+        lines.append(self.MENU_TEXT)
+        print("\n".join(lines))
+
+        while True:
+            try:
+                choice = self.read_input(self.MENU_PROMPT, state).strip()
+
+                # Read-only commands are answered here and the prompt
+                # repeated: no checkpoint, no trip through the command node
+                if self.command_agent and self.command_agent.answer_read_only(
+                    choice, state
+                ):
+                    continue
+            except (KeyboardInterrupt, EOFError):
+                # Handle Ctrl+C or EOF gracefully
+                print("\n\nInterrupt detected...")
+                state["action"] = "interrupt"
+                state["interrupted"] = True
+                return state
+            break
+
+        # Create a checkpoint before processing choice. Only menu entries
+        # name it: command text (`/rewind menu_choice_1`) would index junk
+        if choice in ("1", "2"):
+            label = choice
+        elif not choice:
+            label = "exit"
+        else:
+            label = "command" if self._is_command(choice) else "other"
+        state = self.create_checkpoint(state, f"menu_choice_{label}")
 
         # OBSERVE: Record user's choice and decide next action
         if not choice:
@@ -64,6 +111,7 @@ class SupervisorAgent(ReActAgent):
             state["action"] = "number_game"
             state["current_game"] = "number_game"
             state["number_games_played"] = state.get("number_games_played", 0) + 1
+            counters().add("number_games_started")
         elif choice == "2":
             observation = self.observe(
                 state, "User selected Word Game - initializing word game session"
@@ -71,17 +119,8 @@ class SupervisorAgent(ReActAgent):
             state["action"] = "word_game"
             state["current_game"] = "word_game"
             state["word_games_played"] = state.get("word_games_played", 0) + 1
-        elif choice.startswith("/") or choice.lower() in [
-            "help",
-            "status",
-            "save",
-            "load",
-            "pause",
-            "resume",
-            "switch",
-            "clear",
-            "list",
-        ]:
+            counters().add("word_games_started")
+        elif self._is_command(choice):
             # Command detected - let CommandAgent handle it
             observation = self.observe(
                 state, f"Command detected: {choice} - routing to CommandAgent"
@@ -108,23 +147,27 @@ class SupervisorAgent(ReActAgent):
         # ACT: Calculate and display summary
         action = self.act(state, "Generating session summary report")
 
+        lines = []
         # Check if session was interrupted
         if state.get("interrupted", False):
-            print(f"\nSession ended due to interruption.")
+            lines.append("\nSession ended due to interruption.")
 
-        print(f"\nSession Summary (Should be saved in DB for persistence):")
-        print(f"Session ID: {state.get('session_id', 'N/A')}")
-        print(
-            f"Word Games Played: {state.get('word_games_played', 0)} | Wins: {state.get('word_wins', 0)}"
-        )
-        print(
-            f"Number Games Played: {state.get('number_games_played', 0)} | Wins: {state.get('number_wins', 0)}"
-        )
+        lines += [
+            "\nSession Summary (Should be saved in DB for persistence):",
+            f"Session ID: {state.get('session_id', 'N/A')}",
+            f"Word Games Played: {state.get('word_games_played', 0)} | "
+            f"Wins: {state.get('word_wins', 0)}",
+            f"Number Games Played: {state.get('number_games_played', 0)} | "
+            f"Wins: {state.get('number_wins', 0)}",
+        ]
 
         # Show checkpoint info if available
         if state.get("resumable", False):
-            print(f"Last Checkpoint: {state.get('last_checkpoint', 'N/A')}")
-            print("This session can be resumed later using '/resume' or '/load'")
+            lines += [
+                f"Last Checkpoint: {state.get('last_checkpoint', 'N/A')}",
+                "This session can be resumed later using '/resume' or '/load'",
+            ]
+        print("\n".join(lines))
 
         # OBSERVE: Session completed
         observation = self.observe(state, "Session summary displayed - ending session")
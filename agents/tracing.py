@@ -0,0 +1,227 @@
+"""Background JSONL sink for agent think/act/observe traces
+
+Agents keep only their most recent trace entries in the session context.
+For auditing, every entry can also be sent to a TraceSink: emit() puts the
+event on a bounded queue and returns at once, and a writer thread batches
+queued events into JSONL segment files. A segment is rotated once it
+reaches max_bytes or has been open for max_age seconds, and rotated
+segments can be gzipped. When the queue is full the event is dropped and
+counted, so tracing never stalls a player's turn.
+"""
+
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# Queued to stop the writer once everything before it is written
+_STOP = object()
+
+
+class TraceSink:
+    """Bounded queue plus writer thread producing rotated JSONL segments"""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 16 * 1024 * 1024,
+        max_age: float = 3600.0,
+        compress: bool = False,
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self.written = 0
+        self.dropped = 0
+        self.segments = 0
+        self._drop_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._path: Optional[str] = None
+        self._opened = 0.0
+        self._size = 0
+        self._writer = threading.Thread(
+            target=self._run, name="trace-writer", daemon=True
+        )
+        self._writer.start()
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        """Queue one event for writing; drops it if the queue is full"""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+    def close(self, timeout: Optional[float] = 10.0) -> bool:
+        """Write what is queued, finish the open segment and stop the writer
+
+        Returns False if the writer did not finish within timeout.
+        """
+        if not self._writer.is_alive():
+            return True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            # Writer stuck; give up rather than hang shutdown
+            return False
+        self._writer.join(timeout)
+        return not self._writer.is_alive()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "trace_events_written": self.written,
+            "trace_events_dropped": self.dropped,
+            "trace_segments": self.segments,
+        }
+
+    # -- writer thread ---------------------------------------------------
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                event = self._queue.get(timeout=self.flush_interval)
+                while event is not _STOP:
+                    batch.append(event)
+                    if len(batch) >= self.batch_size:
+                        break
+                    event = self._queue.get_nowait()
+                else:
+                    stopping = True
+            except queue.Empty:
+                pass
+
+            if batch:
+                self._write(batch)
+            if self._file is not None and (
+                stopping
+                or self._size >= self.max_bytes
+                or time.monotonic() - self._opened >= self.max_age
+            ):
+                self._rotate()
+
+    def _write(self, batch) -> None:
+        lines = []
+        for event in batch:
+            try:
+                lines.append(json.dumps(event, default=str))
+            except (TypeError, ValueError):
+                with self._drop_lock:
+                    self.dropped += 1
+        if not lines:
+            return
+        data = "\n".join(lines) + "\n"
+        try:
+            if self._file is None:
+                self._open()
+            self._file.write(data)
+            self._file.flush()
+        except OSError:
+            with self._drop_lock:
+                self.dropped += len(lines)
+            return
+        self._size += len(data)
+        self.written += len(lines)
+
+    def _open(self) -> None:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self._path = os.path.join(
+            self.directory, f"trace-{stamp}-{os.getpid()}-{self.segments}.jsonl"
+        )
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._opened = time.monotonic()
+        self._size = 0
+        self.segments += 1
+
+    def _rotate(self) -> None:
+        """Close the open segment, compressing it if configured"""
+        path = self._path
+        self._file.close()
+        self._file = self._path = None
+        if not self.compress:
+            return
+        try:
+            with open(path, "rb") as src, gzip.open(f"{path}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+        except OSError:
+            # Keep the plain segment
+            pass
+
+
+_sink: Optional[TraceSink] = None
+
+# Set while a streamed node re-runs up to the input it was waiting on, so
+# the entries it already emitted are not written twice
+_muted: ContextVar[bool] = ContextVar("traces_muted", default=False)
+
+
+def set_trace_sink(sink: Optional[TraceSink]) -> None:
+    """Send every agent trace entry in this process to sink (None to stop)"""
+    global _sink
+    _sink = sink
+
+
+def get_trace_sink() -> Optional[TraceSink]:
+    """The process's trace sink, or None if unset or muted in this context"""
+    return None if _muted.get() else _sink
+
+
+def mute_traces(muted: bool = True):
+    """Stop (or resume) emitting trace entries in the current context"""
+    return _muted.set(muted)
+
+
+def unmute_traces(token) -> None:
+    """Restore the muting in effect before mute_traces"""
+    _muted.reset(token)
+
+
+def add_trace_arguments(parser) -> None:
+    """Register the --trace-* options on an argparse parser"""
+    group = parser.add_argument_group("reasoning traces")
+    group.add_argument(
+        "--trace-dir", help="write agent traces as JSONL under this directory"
+    )
+    group.add_argument(
+        "--trace-max-bytes",
+        type=int,
+        default=16 * 1024 * 1024,
+        help="rotate a trace segment at this size",
+    )
+    group.add_argument(
+        "--trace-max-age",
+        type=float,
+        default=3600.0,
+        help="rotate a trace segment after this many seconds",
+    )
+    group.add_argument(
+        "--trace-compress", action="store_true", help="gzip rotated trace segments"
+    )
+
+
+def trace_sink_from_args(args) -> Optional[TraceSink]:
+    """A started TraceSink for the --trace-* options, or None without --trace-dir"""
+    if not args.trace_dir:
+        return None
+    return TraceSink(
+        args.trace_dir,
+        max_bytes=args.trace_max_bytes,
+        max_age=args.trace_max_age,
+        compress=args.trace_compress,
+    )
@@ -1,5 +1,6 @@
 import random
-from .base_agent import ReActAgent, GameState
+from storage import counters
+from .base_agent import ReActAgent, GameState, is_control_input, session_context
 
 
 class WordGameAgent(ReActAgent):
@@ -7,7 +8,7 @@ class WordGameAgent(ReActAgent):
 
     def __init__(self):
         super().__init__("WordGameAgent")
-        self.word_list = [
+        self.word_list = (
             "apple",
             "banana",
             "car",
@@ -28,13 +29,12 @@ class WordGameAgent(ReActAgent):
             "robot",
             "sunset",
             "tree",
-        ]
-        self.knowledge_base = []
+        )
 
     def _get_input_with_interrupt_check(self, prompt: str, state: GameState) -> tuple:
         """Get user input with interrupt and command handling"""
         try:
-            user_input = input(prompt).strip()
+            user_input = self.read_input(prompt, state, self._accepts).strip()
 
             # Check for interrupt signals
             if user_input.lower() in ["quit", "q", "exit", "/exit"]:
@@ -49,6 +49,14 @@ class WordGameAgent(ReActAgent):
         except (KeyboardInterrupt, EOFError):
             return "interrupt", True
 
+    def _accepts(self, answer: str) -> bool:
+        answer = answer.lower()
+        return (
+            answer in self.word_list
+            or answer in ("yes", "no", "maybe")
+            or is_control_input(answer)
+        )
+
     def play(self, state: GameState) -> GameState:
         # THINK: Initialize word guessing strategy
         thought = self.think(
@@ -68,7 +76,7 @@ class WordGameAgent(ReActAgent):
             if chosen_word == "interrupt":
                 state["action"] = "interrupt"
                 state["interrupted"] = True
-            elif chosen_word.startswith("/"):
+            elif chosen_word.startswith("/") and chosen_word.lower() != "/exit":
                 state["action"] = "command"
                 state["user_input"] = chosen_word
             else:
@@ -103,7 +111,7 @@ class WordGameAgent(ReActAgent):
             "Does it make sound?",
         ]
 
-        self.knowledge_base = []
+        knowledge_base = session_context(state)["knowledge_base"] = []
         for i, question in enumerate(questions):
             if i >= 5:
                 break
@@ -128,7 +136,7 @@ class WordGameAgent(ReActAgent):
                 if answer == "interrupt":
                     state["action"] = "interrupt"
                     state["interrupted"] = True
-                elif answer.startswith("/"):
+                elif answer.startswith("/") and answer.lower() != "/exit":
                     state["action"] = "command"
                     state["user_input"] = answer
                 else:
@@ -139,7 +147,7 @@ class WordGameAgent(ReActAgent):
 
             # OBSERVE: Record answer and update knowledge
             observation = self.observe(state, f"Response to '{question}': {answer}")
-            self.knowledge_base.append({"question": question, "answer": answer})
+            knowledge_base.append({"question": question, "answer": answer})
 
         # Create checkpoint before making final guess
         state = self.create_checkpoint(state, "word_game_making_guess")
@@ -147,7 +155,8 @@ class WordGameAgent(ReActAgent):
         # THINK: Analyze collected information to make educated guess
         thought = self.think(
             state,
-            f"Collected {len(self.knowledge_base)} pieces of information. Analyzing to make best guess.",
+            f"Collected {len(knowledge_base)} pieces of information. "
+            "Analyzing to make best guess.",
         )
 
         # ACT: Make strategic guess based on answers (simplified logic for demo)
@@ -168,10 +177,10 @@ class WordGameAgent(ReActAgent):
         small_items = ["apple", "banana", "kite"]
 
         # Simple reasoning based on first question
-        if self.knowledge_base and self.knowledge_base[0]["answer"] == "yes":
+        if knowledge_base and knowledge_base[0]["answer"] == "yes":
             candidates = living_things
             reasoning = "Based on 'living thing' = yes, focusing on living candidates"
-        elif self.knowledge_base and self.knowledge_base[0]["answer"] == "no":
+        elif knowledge_base and knowledge_base[0]["answer"] == "no":
             candidates = non_living + small_items
             reasoning = (
                 "Based on 'living thing' = no, focusing on non-living candidates"
@@ -180,7 +189,13 @@ class WordGameAgent(ReActAgent):
             candidates = self.word_list
             reasoning = "Insufficient clear answers, making random guess"
 
-        guess = random.choice(candidates)
+        # Seed from the game itself so a node that is re-run on resume makes
+        # the same guess it made the first time
+        rng = random.Random(
+            f"{state.get('session_id')}:"
+            f"{state.get('word_games_played', 0)}:{chosen_word}"
+        )
+        guess = rng.choice(candidates)
 
         action = self.act(
             state, f"Making educated guess: {guess} (reasoning: {reasoning})"
@@ -195,7 +210,7 @@ class WordGameAgent(ReActAgent):
             if correct == "interrupt":
                 state["action"] = "interrupt"
                 state["interrupted"] = True
-            elif correct.startswith("/"):
+            elif correct.startswith("/") and correct.lower() != "/exit":
                 state["action"] = "command"
                 state["user_input"] = correct
             else:
@@ -212,6 +227,7 @@ class WordGameAgent(ReActAgent):
             )
             print("Correct! I guessed your word.")
             state["word_wins"] = state.get("word_wins", 0) + 1
+            counters().add("word_wins")
             print(f"Word Game Wins: {state.get('word_wins', 0)}")
         else:
             observation = self.observe(
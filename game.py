@@ -1,29 +1,306 @@
 """Enhanced Multi-Agent Game System with Command Agent and Interrupt/Resume Logic"""
 
+import argparse
+import copy
+import os
 import random
 import uuid
-import signal
 import sys
-from typing import Dict, Any, List
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from storage import CheckpointIndex, SessionJournal, cli, counters
 from agents import (
     GameState,
     SupervisorAgent,
     NumberGameAgent,
     WordGameAgent,
     CommandAgent,
+    set_input_provider,
+    reset_input_provider,
+    get_input_provider,
+    drop_pending_inputs,
+    ShutdownCoordinator,
+    ShutdownRequested,
+    shutdown_token,
+    add_trace_arguments,
+    mute_traces,
+    set_trace_sink,
+    unmute_traces,
+    trace_sink_from_args,
 )
 
+# Resume value sent when the player hits Ctrl+C or EOF at a streamed prompt
+INTERRUPT_SIGNAL = {"signal": "interrupt"}
 
-def create_game_system():
-    """Create the ReAct-based game system"""
+# Where print() output goes for the current context; None means the real
+# stdout. A process hosting many sessions gives each turn its own buffer.
+_output_sink: ContextVar = ContextVar("output_sink", default=None)
+
+
+class _DiscardOutput:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class OutputFrame:
+    """Collects a turn's output so it reaches the player in one write
+
+    Agents print freely while a turn runs; the frame only appends. send()
+    writes everything collected, plus a trailer such as the prompt that
+    ends the turn, to stream with a single write and flush.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self._parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self._parts.append(text)
+        return len(text)
+
+    def flush(self):
+        # Held until send(): flushing every print would undo the frame
+        pass
+
+    def getvalue(self) -> str:
+        return "".join(self._parts)
+
+    def send(self, trailer: str = "") -> None:
+        """Write the frame and trailer to stream and start a new frame"""
+        self._parts.append(trailer)
+        text = "".join(self._parts)
+        self._parts.clear()
+        if text:
+            self.stream.write(text)
+            self.stream.flush()
+
+
+class ContextStdout:
+    """sys.stdout stand-in that writes to the current context's output sink"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        sink = _output_sink.get()
+        return (self.stream if sink is None else sink).write(text)
+
+    def flush(self):
+        sink = _output_sink.get()
+        (self.stream if sink is None else sink).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def set_output_sink(sink):
+    """Send print() output in this context to sink (None means stdout)"""
+    if not isinstance(sys.stdout, ContextStdout):
+        sys.stdout = ContextStdout(sys.stdout)
+    return _output_sink.set(sink)
+
+
+def reset_output_sink(token) -> None:
+    """Restore the output sink active before set_output_sink"""
+    _output_sink.reset(token)
+
+
+class GraphInput:
+    """Serves agent input through LangGraph interrupts in streaming mode
+
+    A resumed node is re-run from the top, with LangGraph handing back the
+    answers it already received. Output printed while those prompts are
+    replayed is discarded so each line reaches the player only once.
+    """
+
+    def __init__(self, on_input=None):
+        # thread_id -> prompts answered so far by the node waiting on input
+        self._answered: Dict[str, int] = {}
+        # Called as on_input(session_id, prompt, answer) for fresh answers only
+        self.on_input = on_input
+
+    def wrap(self, node_fn):
+        """Wrap a node so its input requests become graph interrupts"""
+        from langgraph.config import get_config
+        from langgraph.errors import GraphInterrupt
+        from langgraph.types import interrupt
+
+        def node(state: GameState) -> GameState:
+            thread_id = get_config()["configurable"]["thread_id"]
+            session_id = state.get("session_id")
+            replaying = self._answered.get(thread_id, 0)
+            calls = 0
+            sink = _output_sink.get()
+            muted = None
+
+            def provider(prompt: str) -> str:
+                nonlocal calls
+                calls += 1
+                try:
+                    answer = interrupt({"prompt": prompt})
+                except GraphInterrupt:
+                    self._answered[thread_id] = calls
+                    raise
+                if calls == replaying:
+                    # Caught up with the answer that was just given
+                    _output_sink.set(sink)
+                    mute_traces(False)
+                if calls >= replaying and self.on_input:
+                    self.on_input(session_id, prompt, answer)
+                if answer == INTERRUPT_SIGNAL:
+                    raise KeyboardInterrupt
+                return answer
+
+            if replaying:
+                muted = set_output_sink(_DiscardOutput())
+                traces_muted = mute_traces()
+            token = set_input_provider(provider)
+            try:
+                result = node_fn(state)
+            except GraphInterrupt:
+                raise
+            except BaseException:
+                self._answered.pop(thread_id, None)
+                raise
+            finally:
+                if muted is not None:
+                    reset_output_sink(muted)
+                    unmute_traces(traces_muted)
+                reset_input_provider(token)
+
+            self._answered.pop(thread_id, None)
+            return result
+
+        return node
+
+    def forget(self, thread_id: str) -> None:
+        """Drop replay bookkeeping for a thread whose run was abandoned"""
+        self._answered.pop(thread_id, None)
+
+
+def indexed_saver(index: CheckpointIndex = None):
+    """A MemorySaver that indexes named checkpoints as they are stored"""
+    from langgraph.checkpoint.memory import MemorySaver
+
+    class IndexedSaver(MemorySaver):
+        def __init__(self, index: CheckpointIndex):
+            super().__init__()
+            self.index = index
+
+        def put(self, config, checkpoint, metadata, new_versions):
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            if config["configurable"].get("checkpoint_ns"):
+                return saved
+            counters().add("checkpoints_written")
+            context = checkpoint["channel_values"].get("context")
+            if context:
+                # Names taken during this super-step map to the checkpoint it
+                # started from: the state as it was when the agent took them,
+                # before the rest of the node's changes
+                parent = config["configurable"].get("checkpoint_id")
+                self.index.record(
+                    config["configurable"]["thread_id"],
+                    context.get("checkpoint_count", 0),
+                    context.get("checkpoint_history", ()),
+                    checkpoint["ts"],
+                    parent or checkpoint["id"],
+                )
+            return saved
+
+        def delete_thread(self, thread_id: str) -> None:
+            super().delete_thread(thread_id)
+            self.index.drop(thread_id)
+
+    return IndexedSaver(index or CheckpointIndex())
+
+
+class NamedCheckpoints:
+    """Restores a graph thread's named checkpoints through the saver's index
+
+    A name maps to the graph checkpoint the super-step in which the agent
+    took it started from, so restoring it undoes what the node went on to
+    do. Restoring is a single index lookup and a single checkpoint load
+    however long the thread's history is.
+    Without a thread_id, the thread of the node currently running is used.
+    """
+
+    def __init__(self, saver):
+        self.saver = saver
+
+    def _thread(self, thread_id: Optional[str]) -> str:
+        if thread_id is not None:
+            return thread_id
+        from langgraph.config import get_config
+
+        return get_config()["configurable"]["thread_id"]
+
+    def names(self, thread_id: str = None) -> List[str]:
+        """Checkpoint names that can be restored, oldest first"""
+        return self.saver.index.names(self._thread(thread_id))
+
+    def load(
+        self, name: str, before: str = None, thread_id: str = None
+    ) -> Optional[Dict[str, Any]]:
+        """State values saved at the named checkpoint, or None if unknown
+
+        before (an ISO 8601 timestamp) picks the latest checkpoint of that
+        name taken at or before it instead of the latest overall.
+        """
+        thread_id = self._thread(thread_id)
+        entry = self.saver.index.lookup(thread_id, name, before)
+        if entry is None:
+            return None
+        _, checkpoint_id = entry
+        saved = self.saver.get_tuple(
+            {
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": "",
+                    "checkpoint_id": checkpoint_id,
+                }
+            }
+        )
+        return None if saved is None else dict(saved.checkpoint["channel_values"])
+
+
+def create_game_system(
+    streaming: bool = False,
+    journal: SessionJournal = None,
+    graph_input: GraphInput = None,
+    command_agent: CommandAgent = None,
+):
+    """Create the ReAct-based game system
+
+    With streaming=True every human input is requested through a LangGraph
+    interrupt, so a session runs as one graph execution driven by
+    run_streaming instead of being re-invoked from the menu each turn.
+
+    With a journal, every user input and the state changes made by each node
+    are appended to the session's journal for crash recovery.
+
+    Every node checks the shutdown token before it runs and raises
+    ShutdownRequested once shutdown has begun.
+
+    Pass graph_input to keep a handle on the streaming input bookkeeping
+    (hosts that abandon runs need to call its forget()), and command_agent
+    to have the graph run a host's own (e.g. hosted) CommandAgent.
+    """
+    # Imported here so the storage subcommands never load LangGraph
+    from langgraph.graph import StateGraph, END
+
+    saver = indexed_saver()
 
     # Initialize ReAct agents
-    supervisor = SupervisorAgent()
+    if command_agent is None:
+        command_agent = CommandAgent()
+    command_agent.checkpoints = NamedCheckpoints(saver)
+    supervisor = SupervisorAgent(command_agent)
     number_agent = NumberGameAgent()
     word_agent = WordGameAgent()
-    command_agent = CommandAgent()
 
     # Create graph
     workflow = StateGraph(GameState)
@@ -35,12 +312,17 @@ def create_game_system():
     def number_game_node(state: GameState) -> GameState:
         # Create checkpoint before starting game
         state = number_agent.create_checkpoint(state, "before_number_game")
-        return number_agent.play(state)
+        state = number_agent.play(state)
+        # Answers queued past the game's end were not meant for the menu
+        drop_pending_inputs(state)
+        return state
 
     def word_game_node(state: GameState) -> GameState:
         # Create checkpoint before starting game
         state = word_agent.create_checkpoint(state, "before_word_game")
-        return word_agent.play(state)
+        state = word_agent.play(state)
+        drop_pending_inputs(state)
+        return state
 
     def command_node(state: GameState) -> GameState:
         """Handle command processing"""
@@ -54,13 +336,64 @@ def create_game_system():
     def summary_node(state: GameState) -> GameState:
         return supervisor.show_summary(state)
 
+    if not streaming:
+        graph_input = None
+    elif graph_input is None:
+        graph_input = GraphInput()
+    if graph_input and journal and graph_input.on_input is None:
+        graph_input.on_input = journal.record_input
+
+    def journaled(name, node_fn):
+        def node(state: GameState) -> GameState:
+            # Deep: nodes change context and other nested fields in place,
+            # and a shallow copy would already hold their new values
+            before = copy.deepcopy(state)
+            if name == "menu":
+                # Each menu turn is where crash recovery replays from
+                journal.record_boundary(before)
+            token = None
+            if not streaming:
+                read = get_input_provider()
+
+                def provider(prompt: str) -> str:
+                    answer = read(prompt)
+                    journal.record_input(before.get("session_id"), prompt, answer)
+                    return answer
+
+                token = set_input_provider(provider)
+            try:
+                result = node_fn(state)
+            finally:
+                if token is not None:
+                    reset_input_provider(token)
+            journal.record_transition(name, before, result)
+            return result
+
+        return node
+
+    token = shutdown_token()
+
+    def cancellable(node_fn):
+        def node(state: GameState) -> GameState:
+            token.raise_if_cancelled()
+            return node_fn(state)
+
+        return node
+
+    def add_node(name, node_fn):
+        if journal:
+            node_fn = journaled(name, node_fn)
+        if graph_input:
+            node_fn = graph_input.wrap(node_fn)
+        workflow.add_node(name, cancellable(node_fn))
+
     # Add nodes
-    workflow.add_node("menu", menu_node)
-    workflow.add_node("number_game", number_game_node)
-    workflow.add_node("word_game", word_game_node)
-    workflow.add_node("command", command_node)
-    workflow.add_node("interrupt", interrupt_node)
-    workflow.add_node("summary", summary_node)
+    add_node("menu", menu_node)
+    add_node("number_game", number_game_node)
+    add_node("word_game", word_game_node)
+    add_node("command", command_node)
+    add_node("interrupt", interrupt_node)
+    add_node("summary", summary_node)
 
     # Define routing
     def route_from_menu(state: GameState) -> str:
@@ -90,6 +423,12 @@ def create_game_system():
         else:
             return "menu"
 
+    def route_from_game(state: GameState) -> str:
+        """Route after a game: a command typed mid-game runs before the menu"""
+        if state.get("action") == "command":
+            return "command"
+        return "menu"
+
     def route_from_interrupt(state: GameState) -> str:
         """Route after interrupt handling"""
         action = state.get("action", "exit")
@@ -105,36 +444,166 @@ def create_game_system():
     workflow.add_conditional_edges("menu", route_from_menu)
     workflow.add_conditional_edges("command", route_from_command)
     workflow.add_conditional_edges("interrupt", route_from_interrupt)
-    workflow.add_edge("number_game", "menu")
-    workflow.add_edge("word_game", "menu")
+    workflow.add_conditional_edges("number_game", route_from_game)
+    workflow.add_conditional_edges("word_game", route_from_game)
     workflow.add_edge("summary", END)
 
     # Compile with memory
-    memory = MemorySaver()
-    return workflow.compile(checkpointer=memory)
+    return workflow.compile(checkpointer=saver)
+
+
+def drain_session(
+    coordinator: ShutdownCoordinator,
+    state: Dict[str, Any],
+    command_agent: CommandAgent,
+    journal: SessionJournal,
+    trace_sink=None,
+) -> None:
+    """Register the drain steps for a terminal session being shut down
+
+    The session is paused to its auto-named save (which supersedes its
+    journal), then the journal and the trace files are flushed.
+    """
+    session_id = state.get("session_id")
+    name = f"session_{session_id}"
+
+    def save_session(remaining: float) -> bool:
+        token = set_output_sink(_DiscardOutput())
+        try:
+            command_agent._pause_session(state)
+        finally:
+            reset_output_sink(token)
+        if command_agent.store.locate(name) is None:
+            return False
+        journal.close(session_id)
+        return True
 
+    def flush_journal(remaining: float) -> bool:
+        journal.shutdown()
+        return True
 
-def setup_signal_handlers(current_state):
-    """Setup signal handlers for graceful interruption"""
+    coordinator.add_step(name, save_session)
+    coordinator.add_step("journal", flush_journal)
+    if trace_sink is not None:
+        coordinator.add_step("traces", trace_sink.close)
 
-    def signal_handler(signum, frame):
-        print(f"\n\nReceived signal {signum}. Initiating graceful shutdown...")
-        current_state["action"] = "interrupt"
-        current_state["interrupted"] = True
-        # Don't exit immediately, let the workflow handle it
 
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+def stream_turn(graph, payload, config) -> Optional[str]:
+    """Advance a streamed session until it waits for input
+
+    Returns the prompt the graph is waiting on, or None once it reached END.
+    """
+    prompt = None
+    for chunk in graph.stream(payload, config, stream_mode="updates"):
+        for pending in chunk.get("__interrupt__", ()):
+            prompt = pending.value["prompt"]
+    return prompt
+
+
+class FramedInput:
+    """Terminal input that sends the turn's frame together with the prompt"""
+
+    def __init__(self, frame: OutputFrame):
+        self.frame = frame
+
+    def __call__(self, prompt: str) -> str:
+        self.frame.send(prompt)
+        return input()
 
 
-def initialize_state_with_resume_check(command_agent: CommandAgent) -> Dict[str, Any]:
-    """Initialize state and check for resumable sessions"""
-    # Check for resumable sessions
-    import os
+class ScriptedInput:
+    """Reads input lines from a script file, then from the terminal
 
-    checkpoint_dir = "checkpoints"
+    Lines are fed to prompts exactly as if typed, so a line may carry
+    several space-separated answers. Blank lines count as empty input;
+    lines starting with '#' are comments. Once the script runs out, read
+    asks the terminal.
+    """
 
-    current_state = {
+    def __init__(self, path: str, read: Callable[[str], str] = input):
+        self.read = read
+        with open(path, "r") as f:
+            self.lines = deque(
+                line.rstrip("\n") for line in f if not line.lstrip().startswith("#")
+            )
+
+    @classmethod
+    def from_lines(
+        cls, lines: List[str], read: Callable[[str], str] = input
+    ) -> "ScriptedInput":
+        """Script of the given lines, e.g. journaled inputs to replay"""
+        script = cls.__new__(cls)
+        script.read = read
+        script.lines = deque(lines)
+        return script
+
+    def __call__(self, prompt: str) -> str:
+        if not self.lines:
+            return self.read(prompt)
+        line = self.lines.popleft()
+        print(f"{prompt}{line}")
+        return line
+
+
+def run_streaming(
+    graph,
+    current_state: Dict[str, Any],
+    config,
+    read: Callable[[str], str] = input,
+    command_agent: CommandAgent = None,
+) -> Dict[str, Any]:
+    """Run a whole session as a single streamed graph execution
+
+    The graph is started once and then only resumed: each human turn costs
+    one Command(resume=...) instead of a full re-entry from the menu.
+
+    With a command_agent, read-only commands typed at the menu are answered
+    from the paused graph's state without resuming it at all.
+    """
+    from langgraph.types import Command
+
+    payload = current_state
+    eof = False
+    prompt = None
+
+    while True:
+        if payload is not None:
+            prompt = stream_turn(graph, payload, config)
+        if prompt is None:
+            # Graph reached END
+            return graph.get_state(config).values
+
+        try:
+            answer = read(prompt)
+        except KeyboardInterrupt:
+            print()
+            answer = INTERRUPT_SIGNAL
+        except EOFError:
+            if eof:
+                raise
+            # Let the agents handle a closed stdin like Ctrl+C once
+            eof = True
+            print()
+            answer = INTERRUPT_SIGNAL
+
+        if (
+            command_agent
+            and prompt == SupervisorAgent.MENU_PROMPT
+            and isinstance(answer, str)
+            and command_agent.answer_read_only(
+                answer, dict(graph.get_state(config).values)
+            )
+        ):
+            # Ask again; the graph stays paused where it was
+            payload = None
+            continue
+
+        payload = Command(resume=answer)
+
+
+def new_session_state() -> Dict[str, Any]:
+    """Initial state for a brand new session"""
+    return {
         "session_id": str(uuid.uuid4()),
         "action": "menu",
         "number_games_played": 0,
@@ -145,55 +614,181 @@ def initialize_state_with_resume_check(command_agent: CommandAgent) -> Dict[str,
         "resumable": False,
     }
 
-    # Check if there are any saved sessions
-    if os.path.exists(checkpoint_dir):
-        checkpoint_files = [
-            f for f in os.listdir(checkpoint_dir) if f.endswith(".json")
-        ]
-        if checkpoint_files:
-            print(f"\nFound {len(checkpoint_files)} saved session(s).")
-            resume_choice = (
-                input("Would you like to resume a previous session? (y/N): ")
-                .strip()
-                .lower()
-            )
 
-            if resume_choice == "y":
-                temp_state = current_state.copy()
-                temp_state["user_input"] = "resume"
-                resumed_state = command_agent.interpret_input("resume", temp_state)
-                if resumed_state.get("session_id") != current_state["session_id"]:
-                    # Session was successfully resumed
-                    current_state = resumed_state
-                    print("Session resumed successfully!")
+def initialize_state_with_resume_check(
+    command_agent: CommandAgent,
+    journal: SessionJournal = None,
+    read: Callable[[str], str] = input,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Initialize state and check for resumable sessions
+
+    Returns the state to start from and the input lines to replay first:
+    a session recovered from its journal restarts at its last menu turn
+    and is replayed from the lines typed after it.
+    """
+    current_state = new_session_state()
+
+    # Sessions that crashed leave their journal behind; journals of games
+    # still running in other processes are locked and not listed
+    crashed = journal.recoverable_sessions() if journal else []
+    if crashed:
+        print(f"\nFound {len(crashed)} session(s) that ended unexpectedly:")
+        for i, session_id in enumerate(crashed, 1):
+            print(f"{i}. {session_id}")
+        recover_choice = (
+            read(f"Recover which one? (1-{len(crashed)}, n to discard them) [1]: ")
+            .strip()
+            .lower()
+        )
+
+        if recover_choice == "n":
+            # Declined journals are dropped so the next start doesn't ask
+            # again, unless a process claimed one since they were listed
+            discarded = sum(journal.discard(session_id) for session_id in crashed)
+            print(f"Discarded {discarded} unrecovered session(s).")
+        else:
+            if recover_choice in ("", "y", "yes"):
+                recover_choice = "1"
+            index = int(recover_choice) - 1 if recover_choice.isdigit() else -1
+            recovered = None
+            if 0 <= index < len(crashed):
+                recovered = journal.recover(crashed[index])
+                if recovered is None:
+                    print("That session was recovered by another process.")
+            else:
+                print("Invalid choice. Recovery skipped.")
+            if recovered:
+                recovered_state, inputs = recovered
+                current_state.update(recovered_state)
+                current_state["action"] = "menu"
+                current_state["interrupted"] = False
+                # Replay stops at a Ctrl+C, which the agents answered with
+                # their own prompts
+                replay = []
+                for line in inputs:
+                    if not isinstance(line, str):
+                        break
+                    replay.append(line)
+                print(f"Session {crashed[index]} recovered from journal!")
+                if replay:
+                    print(f"Replaying {len(replay)} input(s) typed before the crash.")
+                return current_state, replay
 
-    return current_state
+    # Check if there are any saved sessions
+    # Only probe for one: counting a large catalog would stall startup
+    if next(command_agent.store.names(), None) is not None:
+        print("\nFound saved session(s).")
+        resume_choice = (
+            read("Would you like to resume a previous session? (y/N): ")
+            .strip()
+            .lower()
+        )
+
+        if resume_choice == "y":
+            temp_state = current_state.copy()
+            temp_state["user_input"] = "resume"
+            resumed_state = command_agent.interpret_input("resume", temp_state)
+            if resumed_state.get("session_id") != current_state["session_id"]:
+                # Session was successfully resumed
+                current_state = resumed_state
+                print("Session resumed successfully!")
+
+    return current_state, []
 
 
 def main():
     """Enhanced main game loop with interrupt handling"""
+    parser = argparse.ArgumentParser(description="Multi-Agent Game System")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="run the session as one streamed graph execution using interrupts",
+    )
+    parser.add_argument(
+        "--script",
+        metavar="FILE",
+        help="play the input lines in FILE before reading from the terminal",
+    )
+    parser.add_argument(
+        "--shutdown-timeout",
+        type=float,
+        default=10.0,
+        help="seconds SIGTERM may spend saving the session before exiting",
+    )
+    add_trace_arguments(parser)
+    cli.add_subcommands(parser)
+    args = parser.parse_args()
+    if args.command:
+        return cli.run(args)
+
+    # Everything printed during a turn goes out in one write, together with
+    # the prompt that ends the turn
+    frame = OutputFrame(sys.stdout)
+    set_output_sink(frame)
+    terminal = FramedInput(frame)
+    set_input_provider(terminal)
+    try:
+        return play(args, terminal)
+    finally:
+        frame.send()
+
+
+def play(args, terminal: Callable[[str], str]) -> Optional[int]:
+    """Run one terminal session; terminal reads a line from the player"""
+    trace_sink = trace_sink_from_args(args)
+    set_trace_sink(trace_sink)
+
+    script = ScriptedInput(args.script, read=terminal) if args.script else None
+
     print("=" * 60)
     print("  Welcome to the Enhanced Multi-Agent Game System!")
     print("  Features: Command handling, Interrupt/Resume, Checkpoints")
     print("=" * 60)
 
     # Create agents for initialization
-    command_agent = CommandAgent()
-
-    # Initialize state with resume capability
-    current_state = initialize_state_with_resume_check(command_agent)
-
-    # Setup signal handlers. Graceful shutdown.
-    setup_signal_handlers(current_state)
+    command_agent = CommandAgent(checkpoint_dir=args.checkpoint_dir)
+    journal = SessionJournal(os.path.join(command_agent.checkpoint_dir, "journal"))
+
+    # Initialize state with resume capability. A scripted session always
+    # starts fresh so the script sees the same prompts on every run.
+    if script:
+        current_state = new_session_state()
+    else:
+        current_state, replay = initialize_state_with_resume_check(
+            command_agent, journal, read=terminal
+        )
+        if replay:
+            script = ScriptedInput.from_lines(replay, read=terminal)
+    if script:
+        set_input_provider(script)
+
+    # Graceful shutdown: SIGTERM cancels the running node or input wait and
+    # drains within --shutdown-timeout. Ctrl+C keeps its interactive meaning
+    # (the agents offer to save and exit).
+    coordinator = ShutdownCoordinator(timeout=args.shutdown_timeout)
+    coordinator.install_signal_handlers()
 
     # Create game system
-    graph = create_game_system()
+    graph = create_game_system(
+        streaming=args.stream, journal=journal, command_agent=command_agent
+    )
 
     # Run the game loop
     config = {"configurable": {"thread_id": "main_session"}}
 
     try:
-        while True:
+        if args.stream:
+            current_state.update(
+                run_streaming(
+                    graph,
+                    current_state,
+                    config,
+                    read=script or terminal,
+                    command_agent=command_agent,
+                )
+            )
+
+        while not args.stream:
             # Check for interrupt flag
             if (
                 current_state.get("interrupted", False)
@@ -211,6 +806,12 @@ def main():
             if current_state.get("action") == "end":
                 break
 
+    except ShutdownRequested:
+        print("\n\nShutdown requested. Saving session...")
+        # The graph holds the state as of the last completed step, which
+        # may be newer than the last result seen here
+        current_state.update(graph.get_state(config).values)
+
     except KeyboardInterrupt:
         print("\n\nKeyboard interrupt detected. Initiating graceful shutdown...")
         current_state["interrupted"] = True
@@ -218,8 +819,14 @@ def main():
 
         # Try to run one more time to handle the interrupt gracefully
         try:
-            result = graph.invoke(current_state, config)
-            current_state.update(result)
+            if args.stream:
+                # The streamed run is suspended mid-node; save what it last
+                # checkpointed rather than starting a second run
+                current_state.update(graph.get_state(config).values)
+                command_agent._save_session(current_state, auto_name=True)
+            else:
+                result = graph.invoke(current_state, config)
+                current_state.update(result)
         except:
             print("Emergency exit - session state may not be saved.")
 
@@ -235,8 +842,21 @@ def main():
         except:
             print("Could not save session due to error.")
 
+    if coordinator.token.cancelled:
+        drain_session(coordinator, current_state, command_agent, journal, trace_sink)
+        for line in coordinator.drain().lines():
+            print(line)
+        return 0
+
+    if current_state.get("action") == "end":
+        # Clean finish: nothing to recover
+        journal.close(current_state.get("session_id"))
+    journal.shutdown()
+    if trace_sink is not None:
+        trace_sink.close()
+
     print("\nThanks for playing!")
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
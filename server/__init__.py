@@ -0,0 +1,9 @@
+from .host import SessionHost, HostedSession, deep_sizeof
+from .tcp import serve
+
+__all__ = [
+    "SessionHost",
+    "HostedSession",
+    "deep_sizeof",
+    "serve",
+]
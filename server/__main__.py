@@ -0,0 +1,222 @@
+"""Run the game as a network service: python -m server"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+
+from agents import add_trace_arguments, set_trace_sink, trace_sink_from_args
+from storage import SharedCounters, use_counters
+
+from .admission import AdmissionController, ConnectionLimits
+from .host import SessionHost
+from .metrics import serve_metrics
+from .tcp import serve
+
+logger = logging.getLogger(__name__)
+
+
+def _run_server(args, reuse_port: bool = False, metrics_port=None) -> None:
+    # Each worker writes its own segments (the pid is in the file name)
+    trace_sink = trace_sink_from_args(args)
+    set_trace_sink(trace_sink)
+    admission = None
+    if args.max_sessions:
+        admission = AdmissionController(
+            max_sessions=args.max_sessions,
+            queue_limit=args.queue_limit,
+            queue_timeout=args.queue_timeout,
+            target_latency=args.target_latency_ms / 1000,
+            memory_limit=args.memory_limit,
+        )
+    host = SessionHost(
+        idle_timeout=args.idle_timeout,
+        memory_budget=args.memory_budget,
+        journal_commit_ms=args.journal_commit_ms,
+        admission=admission,
+    )
+    limits = ConnectionLimits(
+        input_rate=args.input_rate,
+        input_burst=args.input_burst,
+        outbound_limit=args.outbound_limit,
+        send_timeout=args.send_timeout,
+    )
+    try:
+        asyncio.run(
+            serve(
+                host,
+                args.host,
+                args.port,
+                reuse_port=reuse_port,
+                metrics_port=metrics_port,
+                limits=limits,
+                shutdown_timeout=args.shutdown_timeout,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if trace_sink is not None:
+            trace_sink.close()
+
+
+def _worker(args, counters_name: str, slot: int) -> None:
+    """One of --workers processes sharing the port and the counter block"""
+    # The parent owns Ctrl+C and stops workers with SIGTERM, which pauses
+    # their sessions on the way out like Ctrl+C does for a single server
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    logging.basicConfig(
+        level=logging.INFO, format=f"%(asctime)s [worker {slot}] %(message)s"
+    )
+    use_counters(SharedCounters.attach(counters_name, slot))
+    _run_server(args, reuse_port=True)
+
+
+async def _supervise(workers, shared: SharedCounters, args) -> None:
+    metrics = None
+    if args.metrics_port is not None:
+        metrics = await serve_metrics(shared, args.host, args.metrics_port)
+    try:
+        while any(worker.is_alive() for worker in workers):
+            await asyncio.sleep(1.0)
+            for worker in workers:
+                if not worker.is_alive() and worker.exitcode not in (None, 0):
+                    logger.warning(
+                        "%s exited with status %s", worker.name, worker.exitcode
+                    )
+    finally:
+        if metrics is not None:
+            metrics.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-Agent Game System server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=300.0,
+        help="seconds of inactivity before a session is hibernated to disk",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        help="hibernate least recently active sessions above this many resident bytes",
+    )
+    parser.add_argument(
+        "--journal-commit-ms",
+        type=float,
+        default=5.0,
+        help="group-commit interval for session journals",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes accepting on the same port (SO_REUSEPORT)",
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, help="serve Prometheus metrics on this port"
+    )
+    parser.add_argument(
+        "--shutdown-timeout",
+        type=float,
+        default=10.0,
+        help="seconds to pause sessions on SIGTERM or Ctrl+C before exiting",
+    )
+
+    admission = parser.add_argument_group("admission control (per worker)")
+    admission.add_argument(
+        "--max-sessions",
+        type=int,
+        help="cap on resident sessions; enables admission control",
+    )
+    admission.add_argument(
+        "--queue-limit", type=int, default=100, help="sessions waiting for a slot"
+    )
+    admission.add_argument(
+        "--queue-timeout",
+        type=float,
+        default=10.0,
+        help="seconds a session waits for a slot before it is turned away",
+    )
+    admission.add_argument(
+        "--target-latency-ms",
+        type=float,
+        default=500.0,
+        help="p95 turn latency above which the session cap is lowered",
+    )
+    admission.add_argument(
+        "--memory-limit",
+        type=int,
+        help="resident bytes above which the session cap is lowered",
+    )
+
+    backpressure = parser.add_argument_group("per-connection backpressure")
+    backpressure.add_argument(
+        "--input-rate", type=float, help="lines per second a client may send"
+    )
+    backpressure.add_argument(
+        "--input-burst", type=float, default=10.0, help="lines allowed in a burst"
+    )
+    backpressure.add_argument(
+        "--outbound-limit",
+        type=int,
+        default=64 * 1024,
+        help="unread reply bytes buffered per client before the server waits",
+    )
+    backpressure.add_argument(
+        "--send-timeout",
+        type=float,
+        default=30.0,
+        help="drop clients that leave a reply unread this long",
+    )
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    # SIGTERM (a deploy) pauses sessions the same way Ctrl+C does
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    if args.workers <= 1:
+        _run_server(args, metrics_port=args.metrics_port)
+        return
+
+    # Workers count into their own slot of one shared block; the parent
+    # only reads it for the metrics endpoint
+    shared = SharedCounters.create(args.workers)
+    workers = [
+        multiprocessing.Process(
+            target=_worker, args=(args, shared.name, slot), name=f"worker-{slot}"
+        )
+        for slot in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    logger.info("Started %d workers on %s:%d", len(workers), args.host, args.port)
+
+    try:
+        asyncio.run(_supervise(workers, shared, args))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        # Workers drain in parallel; allow their deadline plus start-up slack
+        deadline = time.monotonic() + args.shutdown_timeout + 5.0
+        for worker in workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+            if worker.is_alive():
+                logger.warning("%s did not stop in time; killing it", worker.name)
+                worker.kill()
+                worker.join()
+        shared.close()
+        shared.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Admission control and backpressure for hosted sessions
+
+Resident sessions take a slot from an AdmissionController. When every slot
+is taken, new sessions and hibernated sessions coming back wait in a
+bounded priority queue (returning players first) and are turned away with
+a retry hint once it is full or their wait times out. The slot limit
+itself adapts to load: it is cut multiplicatively while turn latency or
+resident memory is over target and grows by one while it is the binding
+constraint and the process is healthy (AIMD).
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    resource = None
+
+# Admission priorities, most important first
+RESUMED = 0
+NEW = 1
+
+# Limit cut applied per interval while overloaded
+DECREASE_FACTOR = 0.75
+
+
+class AdmissionRejected(Exception):
+    """No slot available; the client should retry after retry_after seconds"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"server busy, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def resident_bytes() -> Optional[int]:
+    """Current resident set size of this process, if it can be measured"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    # Peak rather than current RSS: KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class TokenBucket:
+    """Per-connection input rate limit; take() waits for a token"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self) -> None:
+        self._refill()
+        if self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+class AdmissionController:
+    """Caps resident sessions, queueing by priority, with an adaptive limit"""
+
+    def __init__(
+        self,
+        max_sessions: int,
+        min_sessions: int = 1,
+        queue_limit: int = 100,
+        queue_timeout: float = 10.0,
+        target_latency: float = 0.5,
+        memory_limit: Optional[int] = None,
+        adjust_interval: float = 1.0,
+        retry_after: float = 5.0,
+    ):
+        self.max_sessions = max_sessions
+        self.min_sessions = min(min_sessions, max_sessions)
+        self.limit = max_sessions
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.memory_limit = memory_limit
+        self.adjust_interval = adjust_interval
+        self.base_retry_after = retry_after
+
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        # (priority, arrival, future) heap of sessions waiting for a slot
+        self._waiters = []
+        self._arrivals = itertools.count()
+        self._latencies = deque(maxlen=512)
+
+    # -- slots -----------------------------------------------------------
+
+    def retry_after(self) -> float:
+        """Retry hint, longer the more oversubscribed the host is"""
+        load = 1 + len(self._waiters) / max(self.limit, 1)
+        return round(self.base_retry_after * load, 1)
+
+    def _reject(self) -> AdmissionRejected:
+        self.rejected += 1
+        return AdmissionRejected(self.retry_after())
+
+    async def acquire(self, priority: int = NEW) -> None:
+        """Take a slot, waiting in the queue if need be
+
+        Raises AdmissionRejected if the queue is full (and nothing of lower
+        priority can be shed) or the wait times out.
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.queue_limit and not self._shed(priority):
+            raise self._reject()
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._arrivals), future))
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._forget(future)
+            raise self._reject() from None
+        except BaseException:
+            self._forget(future)
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # Granted as we were cancelled; hand the slot on
+                self.release()
+            raise
+        self.admitted += 1
+
+    def _shed(self, priority: int) -> bool:
+        """Reject the newest waiter below priority to make room"""
+        victims = [w for w in self._waiters if w[0] > priority and not w[2].done()]
+        if not victims:
+            return False
+        victim = max(victims)
+        self._waiters.remove(victim)
+        heapq.heapify(self._waiters)
+        victim[2].set_exception(self._reject())
+        return True
+
+    def _forget(self, future) -> None:
+        self._waiters = [w for w in self._waiters if w[2] is not future]
+        heapq.heapify(self._waiters)
+
+    def release(self) -> None:
+        """Return a slot and admit waiters while there is room"""
+        self.active = max(0, self.active - 1)
+        self._grant()
+
+    def _grant(self) -> None:
+        while self._waiters and self.active < self.limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.active += 1
+            future.set_result(None)
+
+    # -- adaptive limit --------------------------------------------------
+
+    def observe_latency(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+
+    def _latency_p95(self) -> Optional[float]:
+        if not self._latencies:
+            return None
+        samples = sorted(self._latencies)
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def adjust(self) -> None:
+        """One AIMD step from the latency and memory seen since the last one"""
+        latency = self._latency_p95()
+        self._latencies.clear()
+        rss = resident_bytes() if self.memory_limit else None
+
+        overloaded = (latency is not None and latency > self.target_latency) or (
+            rss is not None and rss > self.memory_limit
+        )
+        if overloaded:
+            self.limit = max(self.min_sessions, int(self.limit * DECREASE_FACTOR))
+        elif self.active >= self.limit and self.limit < self.max_sessions:
+            self.limit += 1
+        self._grant()
+
+    async def regulate(self) -> None:
+        """Adjust the limit every adjust_interval until cancelled"""
+        while True:
+            await asyncio.sleep(self.adjust_interval)
+            self.adjust()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "admission_limit": self.limit,
+            "admission_active": self.active,
+            "admission_queued": len(self._waiters),
+            "admission_admitted": self.admitted,
+            "admission_rejected": self.rejected,
+        }
+
+
+@dataclass
+class ConnectionLimits:
+    """Per-connection backpressure; None rate means unlimited input"""
+
+    input_rate: Optional[float] = None
+    input_burst: float = 10.0
+    # Outbound bytes buffered before writes wait for the client to read
+    outbound_limit: int = 64 * 1024
+    # Drop clients that do not read a reply within this many seconds
+    send_timeout: float = 30.0
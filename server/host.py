@@ -0,0 +1,532 @@
+"""Hosts many streamed game sessions in one process"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+
+from langgraph.types import Command
+
+from agents import CommandAgent, DrainReport, get_trace_sink, shutdown_token
+from agents import SupervisorAgent
+from game import (
+    GraphInput,
+    OutputFrame,
+    create_game_system,
+    new_session_state,
+    reset_output_sink,
+    set_output_sink,
+    stream_turn,
+)
+from storage import SessionJournal, counters
+
+from .admission import NEW, RESUMED, AdmissionController
+
+logger = logging.getLogger(__name__)
+
+RESTORED_NOTICE = "Your session was paused while you were idle and has been restored.\n"
+RECONNECTED_NOTICE = "Reconnected to your paused session.\n"
+LOST_NOTICE = (
+    "Your session was paused while you were idle, but its save is no longer "
+    "available. A new session has been started.\n"
+)
+
+# Graph nodes that hold a session inside a game while waiting for input
+GAME_NODES = ("number_game", "word_game")
+
+
+def deep_sizeof(obj, seen=None) -> int:
+    """Approximate bytes held by obj and everything it references"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(
+            deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in list(obj.items())
+        )
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in list(obj))
+    return size
+
+
+class HostedSession:
+    """One connected player, either resident in the graph or hibernated on disk"""
+
+    __slots__ = (
+        "thread_id",
+        "session_id",
+        "prompt",
+        "last_active",
+        "hibernated",
+        "ended",
+        "in_game",
+        "admitted",
+        "checkpoint_id",
+        "answers",
+        "paused",
+        "lock",
+    )
+
+    def __init__(self, state: Dict[str, Any]):
+        # The graph thread keeps the id the session started with; session_id
+        # follows the state (commands that swap in another session's state
+        # are off in server mode)
+        self.thread_id = state["session_id"]
+        self.session_id = state["session_id"]
+        self.prompt: Optional[str] = None
+        self.last_active = time.monotonic()
+        self.hibernated = False
+        self.ended = False
+        self.in_game = False
+        # Holds an admission slot (resident or being restored)
+        self.admitted = False
+        # Graph checkpoint the session waits at, and the answers already
+        # given to the node paused there (it re-runs from the top on resume)
+        self.checkpoint_id: Optional[str] = None
+        self.answers: List[Any] = []
+        # While hibernated: what the pause save leaves out that is needed to
+        # put the session back where it was (action, context, answers)
+        self.paused: Optional[Dict[str, Any]] = None
+        self.lock = asyncio.Lock()
+
+
+class SessionHost:
+    """Runs every connected session as a thread of one shared streaming graph
+
+    Each player message resumes that session's graph thread on a worker
+    thread, with print() output captured per turn. Sessions idle for longer
+    than idle_timeout, or the least recently active ones while resident
+    memory exceeds memory_budget, are hibernated: paused to disk with the
+    same semantics as /pause, and dropped from the graph checkpointer. The
+    next message rehydrates them from the saved session.
+
+    With an AdmissionController, every resident session holds one of its
+    slots: opening a session or rehydrating one waits for a slot (returning
+    players first) and may be rejected with a retry hint.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = 300.0,
+        memory_budget: Optional[int] = None,
+        journal_commit_ms: float = 5.0,
+        admission: Optional[AdmissionController] = None,
+    ):
+        self.idle_timeout = idle_timeout
+        self.admission = admission
+        self.memory_budget = memory_budget
+        # Hosted: players share the store, so commands that reach other
+        # sessions' saves (/resume, /load, /list) are off
+        self.command_agent = CommandAgent(hosted=True)
+        self.journal = SessionJournal(
+            os.path.join(self.command_agent.checkpoint_dir, "journal"),
+            group_commit_ms=journal_commit_ms,
+        )
+        self.graph_input = GraphInput()
+        self.graph = create_game_system(
+            streaming=True,
+            journal=self.journal,
+            graph_input=self.graph_input,
+            command_agent=self.command_agent,
+        )
+        self.sessions: Dict[str, HostedSession] = {}
+
+    # -- turns (worker threads) ------------------------------------------
+
+    def _config(self, session: HostedSession) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": session.thread_id}}
+
+    def _run(self, session: HostedSession, payload) -> Dict[str, Any]:
+        """Advance a session until it next waits for input"""
+        frame = OutputFrame()
+        token = set_output_sink(frame)
+        try:
+            prompt = stream_turn(self.graph, payload, self._config(session))
+        finally:
+            reset_output_sink(token)
+
+        snapshot = self.graph.get_state(self._config(session))
+        session.session_id = snapshot.values.get("session_id", session.session_id)
+        session.prompt = prompt
+        checkpoint_id = snapshot.config["configurable"].get("checkpoint_id")
+        if isinstance(payload, Command) and checkpoint_id == session.checkpoint_id:
+            # Still inside the same node
+            session.answers.append(payload.resume)
+        else:
+            session.checkpoint_id, session.answers = checkpoint_id, []
+        self._set_in_game(
+            session, prompt is not None and bool(set(snapshot.next) & set(GAME_NODES))
+        )
+
+        reply = {"session_id": session.session_id, "output": frame.getvalue()}
+        if prompt is None:
+            session.ended = True
+            reply["end"] = True
+            self.journal.close(session.session_id)
+            self._evict(session)
+        else:
+            reply["prompt"] = prompt
+        return reply
+
+    def _set_in_game(self, session: HostedSession, in_game: bool) -> None:
+        if in_game != session.in_game:
+            session.in_game = in_game
+            counters().add("games_in_progress", 1 if in_game else -1)
+
+    def _evict(self, session: HostedSession) -> None:
+        """Drop a session's graph thread from memory"""
+        self._set_in_game(session, False)
+        self.graph.checkpointer.delete_thread(session.thread_id)
+        self.graph_input.forget(session.thread_id)
+
+    def _hibernate(self, session: HostedSession) -> bool:
+        """Pause a resident session to disk and release its memory"""
+        snapshot = self.graph.get_state(self._config(session))
+        state = dict(snapshot.values)
+        if not state:
+            return False
+
+        # Retention must keep the pause save until the player returns;
+        # pinned first, as saving pokes a retention pass
+        name = self._saved_name(session)
+        retention = self.command_agent.retention
+        retention.pin(name)
+        token = set_output_sink(OutputFrame())
+        try:
+            self.command_agent._pause_session(state)
+        finally:
+            reset_output_sink(token)
+
+        if self.command_agent.store.locate(name) is None:
+            retention.unpin(name)
+            logger.warning(
+                "Could not pause session %s; keeping it resident", session.session_id
+            )
+            return False
+
+        # The pause save supersedes the journal
+        self.journal.close(session.session_id)
+        self._evict(session)
+        session.paused = {
+            "node": snapshot.next[0] if snapshot.next else "menu",
+            "action": state.get("action"),
+            "context": state.get("context"),
+            "answers": session.answers,
+        }
+        session.hibernated = True
+        session.prompt = None
+        return True
+
+    def _answer_read_only(
+        self, session: HostedSession, line: str
+    ) -> Optional[Dict[str, Any]]:
+        """Reply to a read-only menu command without resuming the graph"""
+        frame = OutputFrame()
+        token = set_output_sink(frame)
+        try:
+            state = dict(self.graph.get_state(self._config(session)).values)
+            handled = self.command_agent.answer_read_only(
+                line, state, interactive=False
+            )
+        finally:
+            reset_output_sink(token)
+        if not handled:
+            return None
+        return {
+            "session_id": session.session_id,
+            "output": frame.getvalue(),
+            "prompt": session.prompt,
+        }
+
+    def _rehydrate(
+        self, session: HostedSession, line: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Restart a hibernated session from its pause save, then apply line
+
+        A session hibernated by this process is put back at the prompt it
+        was waiting on, mid-game included: the node it was paused in is
+        replayed with the answers it had already been given, output muted.
+        One restored from disk alone (after a reconnect) starts at the menu.
+        If the save is gone (removed by hand, or evicted by another process
+        sharing the directory) the player is told and starts a new session.
+        """
+        name = self._saved_name(session)
+        self.command_agent.retention.unpin(name)
+        paused, session.paused = session.paused, None
+        session.hibernated = False
+        try:
+            state = self.command_agent.store.load(name)
+        except FileNotFoundError:
+            logger.warning("Pause save %s is missing; starting a new session", name)
+            reply = self._run(session, new_session_state())
+            reply["output"] = LOST_NOTICE + reply["output"]
+            return reply
+
+        state["interrupted"] = False
+        if paused is None:
+            state["action"] = "menu"
+            reply = self._run(session, state)
+        else:
+            state["action"] = paused["action"]
+            if paused["context"] is not None:
+                state["context"] = paused["context"]
+            if paused["node"] == "menu":
+                as_node = "__start__"
+            else:
+                # The action that routed to the waiting node routes there
+                # from the menu too
+                as_node = "menu"
+            self.graph.update_state(self._config(session), state, as_node=as_node)
+            reply = self._run(session, None)
+            for answer in paused["answers"]:
+                reply = self._run(session, Command(resume=answer))
+        if line is not None and not reply.get("end"):
+            reply = self._run(session, Command(resume=line))
+            notice = RESTORED_NOTICE
+        else:
+            notice = RECONNECTED_NOTICE
+        reply["output"] = notice + reply["output"]
+        return reply
+
+    def _saved_name(self, session: HostedSession) -> str:
+        return f"session_{session.session_id}"
+
+    # -- memory accounting -----------------------------------------------
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate resident bytes per session (graph checkpoints + state)"""
+        saver = self.graph.checkpointer
+        by_thread = defaultdict(int)
+        for thread_id, namespaces in list(getattr(saver, "storage", {}).items()):
+            by_thread[thread_id] += deep_sizeof(namespaces)
+        for table in (getattr(saver, "writes", {}), getattr(saver, "blobs", {})):
+            for key, value in list(table.items()):
+                by_thread[key[0]] += deep_sizeof(value)
+
+        return {
+            session.session_id: by_thread.get(session.thread_id, 0)
+            + deep_sizeof(session)
+            for session in list(self.sessions.values())
+            if not session.hibernated
+        }
+
+    def session_counts(self) -> Dict[str, int]:
+        """Cheap per-process session counts (no memory walk)"""
+        sessions = list(self.sessions.values())
+        hibernated = sum(1 for s in sessions if s.hibernated)
+        counts = {
+            "resident_sessions": len(sessions) - hibernated,
+            "hibernated_sessions": hibernated,
+        }
+        if self.admission:
+            counts.update(self.admission.stats())
+        counts.update(self.command_agent.store.cache.stats())
+        trace_sink = get_trace_sink()
+        if trace_sink is not None:
+            counts.update(trace_sink.stats())
+        return counts
+
+    def stats(self) -> Dict[str, Any]:
+        usage = self.memory_usage()
+        return {
+            "sessions": len(self.sessions),
+            "resident": len(usage),
+            "hibernated": sum(1 for s in list(self.sessions.values()) if s.hibernated),
+            "resident_bytes": sum(usage.values()),
+            "per_session_bytes": usage,
+        }
+
+    # -- async API -------------------------------------------------------
+
+    async def _admit(self, session: Optional[HostedSession], priority: int) -> None:
+        if self.admission:
+            await self.admission.acquire(priority)
+        if session is not None:
+            session.admitted = True
+
+    def _release(self, session: HostedSession) -> None:
+        if session.admitted:
+            session.admitted = False
+            if self.admission:
+                self.admission.release()
+
+    async def _turn(self, session: HostedSession, fn, *args) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            reply = await asyncio.to_thread(fn, session, *args)
+        except BaseException:
+            self._release(session)
+            raise
+        if self.admission:
+            self.admission.observe_latency(time.monotonic() - started)
+        if reply.get("end"):
+            self._release(session)
+        return reply
+
+    async def open(self):
+        """Start a new session; returns it with its first reply
+
+        Raises AdmissionRejected if no slot frees up in time.
+        """
+        await self._admit(None, NEW)
+        state = new_session_state()
+        session = HostedSession(state)
+        session.admitted = True
+        self.sessions[session.thread_id] = session
+        counters().add("sessions_connected")
+        async with session.lock:
+            reply = await self._turn(session, self._run, state)
+        return session, reply
+
+    async def handle(self, session: HostedSession, line: str) -> Dict[str, Any]:
+        """Feed one line of player input to a session
+
+        Raises AdmissionRejected if a hibernated session cannot be restored
+        yet; it stays hibernated and the line can be sent again later.
+        """
+        async with session.lock:
+            session.last_active = time.monotonic()
+            if session.hibernated:
+                await self._admit(session, RESUMED)
+                return await self._turn(session, self._rehydrate, line)
+            if session.prompt == SupervisorAgent.MENU_PROMPT and (
+                self.command_agent.is_read_only(line)
+            ):
+                reply = await asyncio.to_thread(self._answer_read_only, session, line)
+                if reply is not None:
+                    return reply
+            return await self._turn(session, self._run, Command(resume=line))
+
+    async def reconnect(self, session: HostedSession, token: str) -> Dict[str, Any]:
+        """Continue the paused session token (a session_id) in place of session
+
+        For a client's first line: the session it was just given has seen
+        no input and is dropped. The paused session restarts at the menu
+        from its pause save (written on disconnect, idle or shutdown). A
+        token that has no pause save, or is in use by another connection,
+        leaves session as it was.
+        """
+        async with session.lock:
+            try:
+                saved = self.command_agent.store.locate(f"session_{token}") is not None
+            except ValueError:
+                saved = False
+            in_use = any(
+                other.session_id == token
+                for other in list(self.sessions.values())
+                if other is not session
+            )
+            if not saved or in_use:
+                return {
+                    "session_id": session.session_id,
+                    "output": "No paused session to reconnect to.\n",
+                    "prompt": session.prompt,
+                }
+            fresh_id, session.session_id = session.session_id, token
+            return await self._turn(session, self._reconnect, fresh_id)
+
+    def _reconnect(self, session: HostedSession, fresh_id: str) -> Dict[str, Any]:
+        self.journal.close(fresh_id)
+        self._evict(session)
+        return self._rehydrate(session)
+
+    async def close(self, session: HostedSession) -> None:
+        """Connection gone: pause the session unless it already finished"""
+        async with session.lock:
+            if not session.ended and not session.hibernated:
+                await asyncio.to_thread(self._hibernate, session)
+            # Nothing will rehydrate it now: the save is an ordinary pause
+            # save, evictable like any other
+            self.command_agent.retention.unpin(self._saved_name(session))
+            self._release(session)
+            if self.sessions.pop(session.thread_id, None) is not None:
+                counters().add("sessions_connected", -1)
+
+    async def hibernate(self, session: HostedSession, reason: str) -> None:
+        if session.lock.locked():
+            # Mid-turn, so not idle after all
+            return
+        async with session.lock:
+            if session.hibernated or session.ended:
+                return
+            if await asyncio.to_thread(self._hibernate, session):
+                self._release(session)
+                logger.info("Hibernated session %s (%s)", session.session_id, reason)
+
+    async def reap_idle(self, interval: Optional[float] = None) -> None:
+        """Periodically hibernate idle sessions and enforce the memory budget"""
+        interval = interval or max(1.0, min(self.idle_timeout / 4, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for session in list(self.sessions.values()):
+                idle = now - session.last_active
+                if not session.hibernated and idle >= self.idle_timeout:
+                    await self.hibernate(session, f"idle {idle:.0f}s")
+
+            if self.memory_budget:
+                await self._enforce_memory_budget()
+
+    async def _enforce_memory_budget(self) -> None:
+        usage = await asyncio.to_thread(self.memory_usage)
+        total = sum(usage.values())
+        if total <= self.memory_budget:
+            return
+
+        resident = sorted(
+            (s for s in list(self.sessions.values()) if not s.hibernated),
+            key=lambda s: s.last_active,
+        )
+        for session in resident:
+            if total <= self.memory_budget:
+                break
+            freed = usage.get(session.session_id, 0)
+            await self.hibernate(session, f"memory budget, {freed} bytes")
+            if session.hibernated:
+                total -= freed
+
+    async def shutdown(self, timeout: float = 10.0) -> DrainReport:
+        """Pause every resident session so players can resume after a restart
+
+        Players get back to their paused session with `/reconnect
+        <session_id>` (see reconnect).
+
+        The shutdown token is cancelled first, so a turn in flight stops at
+        its next node instead of running on. Sessions are then paused
+        concurrently; any not paused within timeout are reported as
+        abandoned (they can still be recovered from their journal).
+        """
+        shutdown_token().cancel()
+        started = time.monotonic()
+        report = DrainReport()
+
+        sessions = [s for s in list(self.sessions.values()) if not s.ended]
+        closing = {asyncio.ensure_future(self.close(s)): s for s in sessions}
+        if closing:
+            await asyncio.wait(closing, timeout=timeout)
+        for task, session in closing.items():
+            name = self._saved_name(session)
+            if not task.done():
+                report.abandoned.append(name)
+            elif task.exception() is not None:
+                report.failed.append((name, str(task.exception())))
+            elif session.hibernated:
+                report.saved.append(name)
+            elif not session.ended:
+                report.failed.append((name, "not saved"))
+
+        remaining = max(0.0, timeout - (time.monotonic() - started))
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self.journal.shutdown), remaining)
+            report.saved.append("journal")
+        except asyncio.TimeoutError:
+            report.abandoned.append("journal")
+        report.elapsed = time.monotonic() - started
+        return report
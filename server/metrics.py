@@ -0,0 +1,79 @@
+"""Minimal HTTP endpoint serving the shared counters as Prometheus text"""
+
+import asyncio
+import logging
+from typing import Callable, Dict, Optional
+
+from storage import SharedCounters
+from storage.counters import COUNTER_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Counters that go up and down; everything else only increases
+GAUGES = ("sessions_connected", "games_in_progress")
+
+
+def render_metrics(
+    shared: SharedCounters, extra: Optional[Callable[[], Dict[str, float]]] = None
+) -> str:
+    """Exposition text: one series per counter and worker, plus extra gauges"""
+    lines = [
+        "# TYPE game_workers gauge",
+        f"game_workers {shared.slots}",
+    ]
+    rows = shared.per_slot()
+    for field in COUNTER_FIELDS:
+        kind = "gauge" if field in GAUGES else "counter"
+        metric = f"game_{field}" if kind == "gauge" else f"game_{field}_total"
+        lines.append(f"# TYPE {metric} {kind}")
+        for worker, row in enumerate(rows):
+            lines.append(f'{metric}{{worker="{worker}"}} {row[field]}')
+
+    for name, value in (extra() if extra else {}).items():
+        lines.append(f"# TYPE game_{name} gauge")
+        lines.append(f"game_{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+async def _handle(reader, writer, shared, extra) -> None:
+    try:
+        request = await reader.readline()
+        # Headers are not needed; read past them
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+
+        parts = request.split()
+        if len(parts) >= 2 and parts[0] == b"GET" and parts[1] in (b"/metrics", b"/"):
+            status, body = "200 OK", render_metrics(shared, extra)
+        else:
+            status, body = "404 Not Found", "not found\n"
+
+        payload = body.encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("ascii")
+            + payload
+        )
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(
+    shared: SharedCounters,
+    address: str,
+    port: int,
+    extra: Optional[Callable[[], Dict[str, float]]] = None,
+):
+    """Start the metrics endpoint; returns the asyncio server"""
+    server = await asyncio.start_server(
+        lambda r, w: _handle(r, w, shared, extra), address, port
+    )
+    logger.info("Serving metrics on http://%s:%d/metrics", address, port)
+    return server
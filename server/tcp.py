@@ -0,0 +1,158 @@
+"""Line-based TCP front end for SessionHost"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import signal
+from typing import Optional
+
+from agents import ShutdownRequested
+from storage import counters
+
+from .admission import AdmissionRejected, ConnectionLimits, TokenBucket
+from .host import SessionHost
+from .metrics import serve_metrics
+
+logger = logging.getLogger(__name__)
+
+# First line that continues a paused session instead of the new one
+RECONNECT = "/reconnect "
+
+
+def _busy(rejected: AdmissionRejected):
+    return {"error": "busy", "retry_after": rejected.retry_after}
+
+
+async def _send(writer: asyncio.StreamWriter, reply, limits: ConnectionLimits) -> None:
+    writer.write((json.dumps(reply) + "\n").encode("utf-8"))
+    # Waits only once the client has more than outbound_limit unread
+    await asyncio.wait_for(writer.drain(), limits.send_timeout)
+
+
+async def handle_connection(
+    host: SessionHost,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    limits: Optional[ConnectionLimits] = None,
+) -> None:
+    """One connection is one session
+
+    The client sends plain text lines (the answers a terminal player would
+    type); the server answers every line with one JSON object holding the
+    turn's output and the next prompt, or "end": true when the session is
+    over. When the host is full the reply is {"error": "busy",
+    "retry_after": seconds}: on connect the connection is then closed,
+    mid-session the line can simply be sent again later.
+
+    Every reply carries the session_id. A client whose connection dropped
+    (or whose server restarted) may send `/reconnect <session_id>` as its
+    first line to continue that session from its pause save.
+    """
+    limits = limits or ConnectionLimits()
+    writer.transport.set_write_buffer_limits(high=limits.outbound_limit)
+    bucket = None
+    if limits.input_rate:
+        bucket = TokenBucket(limits.input_rate, limits.input_burst)
+
+    try:
+        session, reply = await host.open()
+    except AdmissionRejected as rejected:
+        try:
+            await _send(writer, _busy(rejected), limits)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        writer.close()
+        return
+
+    try:
+        await _send(writer, reply, limits)
+        first = True
+        while not reply.get("end"):
+            line = await reader.readline()
+            if not line:
+                break
+            if bucket:
+                # Not reading further stalls a flooding client via TCP
+                await bucket.take()
+            line = line.decode("utf-8").rstrip("\r\n")
+            try:
+                if first and line.startswith(RECONNECT):
+                    token = line[len(RECONNECT) :].strip()
+                    reply = await host.reconnect(session, token)
+                else:
+                    reply = await host.handle(session, line)
+            except AdmissionRejected as rejected:
+                reply = _busy(rejected)
+            first = False
+            await _send(writer, reply, limits)
+    except asyncio.TimeoutError:
+        logger.info("Dropping session %s: client stopped reading", session.session_id)
+    except (
+        ConnectionError,
+        asyncio.IncompleteReadError,
+        ValueError,
+        ShutdownRequested,
+    ):
+        pass
+    finally:
+        await host.close(session)
+        writer.close()
+
+
+async def serve(
+    host: SessionHost,
+    address: str = "127.0.0.1",
+    port: int = 7777,
+    reuse_port: bool = False,
+    metrics_port: Optional[int] = None,
+    limits: Optional[ConnectionLimits] = None,
+    shutdown_timeout: float = 10.0,
+):
+    """Accept players until cancelled, then pause every session
+
+    reuse_port lets several worker processes accept on the same port.
+    SIGTERM stops the server like cancellation does. Pausing is bounded by
+    shutdown_timeout and its outcome is logged.
+    """
+    connections = set()
+
+    async def on_connect(reader, writer):
+        connections.add(writer)
+        try:
+            await handle_connection(host, reader, writer, limits)
+        finally:
+            connections.discard(writer)
+
+    server = await asyncio.start_server(
+        on_connect, address, port, reuse_port=reuse_port
+    )
+    metrics = None
+    if metrics_port is not None:
+        metrics = await serve_metrics(
+            counters(), address, metrics_port, extra=host.session_counts
+        )
+    tasks = [asyncio.create_task(host.reap_idle())]
+    if host.admission:
+        tasks.append(asyncio.create_task(host.admission.regulate()))
+    logger.info("Serving game sessions on %s:%d", address, port)
+
+    # Drain from inside the running loop, so connection handlers can finish
+    stop = asyncio.Event()
+    with contextlib.suppress(NotImplementedError, RuntimeError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        server.close()
+        for task in tasks:
+            task.cancel()
+        if metrics is not None:
+            metrics.close()
+        # Hang up on clients so their handlers finish instead of being
+        # cancelled mid-read when the loop stops
+        for writer in list(connections):
+            writer.close()
+        report = await host.shutdown(shutdown_timeout)
+        for line in report.lines():
+            logger.info(line)
@@ -0,0 +1,27 @@
+from .journal import SessionJournal
+from .session_store import SessionStore
+from .session_cache import SessionCache
+from .retention import (
+    RetentionPolicy,
+    RetentionManager,
+    GcReport,
+    is_pinned,
+    shared_retention,
+)
+from .counters import SharedCounters, counters, use_counters
+from .checkpoint_index import CheckpointIndex
+
+__all__ = [
+    "SessionJournal",
+    "SessionStore",
+    "SessionCache",
+    "RetentionPolicy",
+    "RetentionManager",
+    "GcReport",
+    "is_pinned",
+    "shared_retention",
+    "SharedCounters",
+    "counters",
+    "use_counters",
+    "CheckpointIndex",
+]
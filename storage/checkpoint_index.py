@@ -0,0 +1,88 @@
+"""Index of named checkpoints to stored graph checkpoint ids
+
+Agents name their checkpoints (`menu_choice_1`, `word_selected_piano`, ...)
+but only the latest name survives in `last_checkpoint`. The index remembers
+every name per graph thread together with the timestamp it was indexed at
+and the id of the graph checkpoint the session stood at when it was taken,
+so restoring an older point is one lookup plus one load instead of a walk
+over the thread's whole history.
+"""
+
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# (timestamp, checkpoint id); timestamps are ISO 8601 and sort as strings
+IndexEntry = Tuple[str, str]
+
+
+class CheckpointIndex:
+    """Per-thread map from checkpoint name to (timestamp, checkpoint id)"""
+
+    def __init__(self):
+        # thread_id -> name -> entries, oldest first
+        self._threads: Dict[str, Dict[str, List[IndexEntry]]] = {}
+        # thread_id -> checkpoint names in the order they were first indexed
+        self._order: Dict[str, List[str]] = {}
+        # thread_id -> context["checkpoint_count"] already indexed
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        thread_id: str,
+        count: int,
+        history: Sequence[str],
+        timestamp: str,
+        checkpoint_id: str,
+    ) -> None:
+        """Index the names requested since the last stored checkpoint
+
+        count is the session's running total of requested checkpoint names
+        and history the most recent of them; the names past the count
+        already seen for the thread are mapped to checkpoint_id.
+        """
+        with self._lock:
+            seen = self._seen.get(thread_id, 0)
+            if count < seen:
+                # A different session's context was swapped in
+                seen = 0
+            new = min(count - seen, len(history))
+            if new <= 0:
+                return
+            self._seen[thread_id] = count
+            names = self._threads.setdefault(thread_id, {})
+            order = self._order.setdefault(thread_id, [])
+            for name in history[-new:]:
+                entries = names.get(name)
+                if entries is None:
+                    entries = names[name] = []
+                    order.append(name)
+                elif entries[-1][1] == checkpoint_id:
+                    continue
+                entries.append((timestamp, checkpoint_id))
+
+    def lookup(
+        self, thread_id: str, name: str, before: Optional[str] = None
+    ) -> Optional[IndexEntry]:
+        """Latest entry for name, or the latest at or before timestamp before"""
+        with self._lock:
+            entries = self._threads.get(thread_id, {}).get(name)
+            if not entries:
+                return None
+            if before is None:
+                return entries[-1]
+            i = bisect.bisect_right(entries, (before, "\uffff"))
+            return entries[i - 1] if i else None
+
+    def names(self, thread_id: str) -> List[str]:
+        """Indexed names for thread, in the order they were first taken"""
+        with self._lock:
+            return list(self._order.get(thread_id, ()))
+
+    def drop(self, thread_id: str) -> None:
+        """Forget a thread (its graph checkpoints were deleted)"""
+        with self._lock:
+            self._threads.pop(thread_id, None)
+            self._order.pop(thread_id, None)
+            self._seen.pop(thread_id, None)
@@ -0,0 +1,239 @@
+"""Non-interactive subcommands over the checkpoints directory
+
+Used by `game.py list|stats|show|export|gc`. Everything here talks to the
+session files directly, so it starts fast and never builds the game graph.
+Output is plain, line-oriented text (or JSON where noted) for scripts and
+cron jobs; the exit status is non-zero on failure.
+"""
+
+import json
+import sys
+import time
+from typing import Optional
+
+from .retention import RetentionManager, RetentionPolicy, is_pinned
+from .session_cache import SessionCache
+from .session_store import SessionStore
+
+# Subcommands that only read, so they never create the directory or its locks
+READ_ONLY = ("list", "stats", "show")
+
+# Counters summed by `stats --games`
+GAME_COUNTERS = ("number_games_played", "word_games_played", "number_wins", "word_wins")
+
+
+def _timestamp(seconds: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds))
+
+
+def _resolve(store: SessionStore, session: str) -> Optional[str]:
+    """Stored name for a save name or a bare session id"""
+    for name in (session, f"session_{session}"):
+        try:
+            if store.locate(name) is not None:
+                return name
+        except ValueError:
+            continue
+    return None
+
+
+def cmd_list(store: SessionStore, args) -> int:
+    """One `name<TAB>bytes<TAB>modified` line per session, in directory order"""
+    for count, (name, st) in enumerate(store.entries()):
+        if args.limit is not None and count >= args.limit:
+            break
+        print(f"{name}\t{st.st_size}\t{_timestamp(st.st_mtime)}")
+    return 0
+
+
+def cmd_stats(store: SessionStore, args) -> int:
+    """Catalog totals from file metadata; --games also reads every session"""
+    sessions = total_bytes = pinned = 0
+    oldest = newest = None
+    counters = dict.fromkeys(GAME_COUNTERS, 0)
+    unreadable = 0
+
+    for name, st in store.entries():
+        sessions += 1
+        total_bytes += st.st_size
+        pinned += is_pinned(name)
+        oldest = st.st_mtime if oldest is None else min(oldest, st.st_mtime)
+        newest = st.st_mtime if newest is None else max(newest, st.st_mtime)
+        if args.games:
+            try:
+                data = store.load(name, touch=False)
+            except (OSError, ValueError):
+                unreadable += 1
+                continue
+            for key in GAME_COUNTERS:
+                counters[key] += data.get(key) or 0
+
+    stats = {
+        "sessions": sessions,
+        "total_bytes": total_bytes,
+        "pinned": pinned,
+        "oldest": _timestamp(oldest) if oldest is not None else None,
+        "newest": _timestamp(newest) if newest is not None else None,
+        "flat_layout": store.has_flat_sessions(),
+    }
+    if args.games:
+        stats.update(counters)
+        stats["unreadable"] = unreadable
+
+    if args.json:
+        print(json.dumps(stats))
+    else:
+        for key, value in stats.items():
+            print(f"{key}: {value}")
+    return 0
+
+
+def cmd_show(store: SessionStore, args) -> int:
+    """Print one saved session as JSON"""
+    name = _resolve(store, args.session)
+    if name is None:
+        print(f"No saved session '{args.session}'", file=sys.stderr)
+        return 1
+    try:
+        data = store.load(name, touch=False)
+    except (OSError, ValueError) as e:
+        print(f"Could not read session '{name}': {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(data, indent=2))
+    return 0
+
+
+def cmd_export(store: SessionStore, args) -> int:
+    """Stream sessions to JSONL, CSV or Parquet (see storage.export)"""
+    from .export import SessionExporter
+
+    names = None
+    if args.sessions:
+        names = []
+        for session in args.sessions:
+            name = _resolve(store, session)
+            if name is None:
+                print(f"No saved session '{session}'", file=sys.stderr)
+                return 1
+            names.append(name)
+
+    try:
+        exporter = SessionExporter(
+            store,
+            output=args.output,
+            fmt=args.format,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+        )
+        result = exporter.run(resume=args.resume, names=names)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+
+    if args.output:
+        print(f"Exported {result['rows']} session(s) to {args.output}", file=sys.stderr)
+    if result["skipped"]:
+        print(f"Skipped {result['skipped']} unreadable session(s)", file=sys.stderr)
+    return 0
+
+
+def cmd_gc(store: SessionStore, args) -> int:
+    """Run one retention pass against the environment's budget"""
+    policy = RetentionPolicy.from_env()
+    if args.max_sessions is not None:
+        policy.max_sessions = args.max_sessions
+    if args.max_bytes is not None:
+        policy.max_bytes = args.max_bytes
+
+    report = RetentionManager(store, policy).collect(dry_run=args.dry_run)
+    for line in report.lines(policy):
+        print(line)
+    return 0
+
+
+COMMANDS = {
+    "list": cmd_list,
+    "stats": cmd_stats,
+    "show": cmd_show,
+    "export": cmd_export,
+    "gc": cmd_gc,
+}
+
+
+def add_subcommands(parser) -> None:
+    """Register the subcommands on an argparse parser"""
+    parser.add_argument(
+        "--checkpoint-dir",
+        default="checkpoints",
+        help="checkpoints directory, for the game too (default: checkpoints)",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    list_parser = subparsers.add_parser("list", help="list saved sessions")
+    list_parser.add_argument("--limit", type=int, help="stop after this many")
+
+    stats_parser = subparsers.add_parser("stats", help="summarize saved sessions")
+    stats_parser.add_argument(
+        "--games",
+        action="store_true",
+        help="also total game counters (reads every file)",
+    )
+    stats_parser.add_argument(
+        "--json", action="store_true", help="print one JSON object"
+    )
+
+    show_parser = subparsers.add_parser("show", help="print one saved session")
+    show_parser.add_argument("session", help="save name or session id")
+
+    export_parser = subparsers.add_parser(
+        "export", help="export sessions as JSONL, CSV or Parquet"
+    )
+    export_parser.add_argument(
+        "sessions", nargs="*", help="save names or session ids (default: all)"
+    )
+    export_parser.add_argument(
+        "-o", "--output", help="output file (directory for parquet); default stdout"
+    )
+    export_parser.add_argument(
+        "--format", choices=("jsonl", "csv", "parquet"), default="jsonl"
+    )
+    export_parser.add_argument(
+        "--workers", type=int, default=4, help="threads decoding session files"
+    )
+    export_parser.add_argument(
+        "--chunk-size", type=int, default=10000, help="rows per write / row group"
+    )
+    export_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted export of --output from its cursor",
+    )
+
+    gc_parser = subparsers.add_parser(
+        "gc", help="evict sessions over the retention budget"
+    )
+    gc_parser.add_argument(
+        "--dry-run", action="store_true", help="report without deleting anything"
+    )
+    gc_parser.add_argument(
+        "--max-sessions", type=int, help="override CHECKPOINT_MAX_SESSIONS"
+    )
+    gc_parser.add_argument(
+        "--max-bytes", type=int, help="override CHECKPOINT_MAX_BYTES"
+    )
+
+
+def run(args) -> int:
+    """Run the subcommand selected in args; returns the exit status"""
+    # Listings and exports read each session once; caching them only costs
+    store = SessionStore(
+        args.checkpoint_dir,
+        cache=SessionCache(max_entries=0),
+        read_only=args.command in READ_ONLY,
+    )
+    try:
+        return COMMANDS[args.command](store, args)
+    except BrokenPipeError:
+        # Piped into head or similar; not an error for a listing
+        sys.stderr.close()
+        return 0
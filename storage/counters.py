@@ -0,0 +1,144 @@
+"""Global game counters shared by every worker process
+
+The counters live in one `multiprocessing.shared_memory` block laid out as
+a header (the slot count) followed by one row of int64 cells per worker.
+Each worker process owns a slot and is its only writer, so processes never
+coordinate on the hot path; readers sum the rows. Within a process,
+threads share the slot behind a process-local lock that is never contended
+across processes.
+
+A process that never joins a shared block (the terminal game, a single
+server) gets a private in-memory block with one slot, so agents can count
+unconditionally.
+"""
+
+import multiprocessing
+import threading
+from typing import Dict, List, Optional
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # pragma: no cover - platforms without shared memory
+    shared_memory = None
+
+COUNTER_FIELDS = (
+    "sessions_connected",
+    "games_in_progress",
+    "number_games_started",
+    "word_games_started",
+    "number_wins",
+    "word_wins",
+    "checkpoints_written",
+    "sessions_saved",
+)
+
+_CELL = 8  # bytes per int64
+_HEADER = 1  # cells before the first slot: the slot count
+
+
+def _block_size(slots: int) -> int:
+    return _CELL * (_HEADER + slots * len(COUNTER_FIELDS))
+
+
+class SharedCounters:
+    """Per-worker counter slots in a shared block, summed on read"""
+
+    def __init__(self, buf, slot: int = 0, shm=None):
+        self._shm = shm
+        self._cells = memoryview(buf).cast("q")
+        self.slots = self._cells[0]
+        if not 0 <= slot < self.slots:
+            raise ValueError(f"Slot {slot} out of range for {self.slots} slot(s)")
+        self.slot = slot
+        self._base = _HEADER + slot * len(COUNTER_FIELDS)
+        self._index = {field: i for i, field in enumerate(COUNTER_FIELDS)}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def local(cls) -> "SharedCounters":
+        """A private single-slot block for a process that shares with no one"""
+        buf = bytearray(_block_size(1))
+        memoryview(buf).cast("q")[0] = 1
+        return cls(buf)
+
+    @classmethod
+    def create(cls, slots: int, name: Optional[str] = None) -> "SharedCounters":
+        """Allocate a zeroed shared block with one slot per worker
+
+        The creating process owns the block and must unlink() it.
+        """
+        if shared_memory is None:
+            raise RuntimeError("Shared memory is not available on this platform")
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=_block_size(slots)
+        )
+        shm.buf[: _block_size(slots)] = bytes(_block_size(slots))
+        memoryview(shm.buf).cast("q")[0] = slots
+        return cls(shm.buf, slot=0, shm=shm)
+
+    @classmethod
+    def attach(cls, name: str, slot: int) -> "SharedCounters":
+        """Join an existing block as the writer of slot"""
+        if shared_memory is None:
+            raise RuntimeError("Shared memory is not available on this platform")
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching also registers the block with the
+            # resource tracker. multiprocessing children share the creator's
+            # tracker, where that is harmless; a separately started process
+            # has its own, which would unlink the block when it exits.
+            shm = shared_memory.SharedMemory(name=name)
+            if multiprocessing.parent_process() is None:
+                resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm.buf, slot=slot, shm=shm)
+
+    @property
+    def name(self) -> Optional[str]:
+        return self._shm.name if self._shm else None
+
+    def add(self, field: str, amount: int = 1) -> None:
+        """Add amount to field in this worker's slot"""
+        index = self._base + self._index[field]
+        with self._lock:
+            self._cells[index] += amount
+
+    def _row(self, slot: int) -> Dict[str, int]:
+        base = _HEADER + slot * len(COUNTER_FIELDS)
+        return {field: self._cells[base + i] for i, field in enumerate(COUNTER_FIELDS)}
+
+    def per_slot(self) -> List[Dict[str, int]]:
+        """Each worker's own counters"""
+        return [self._row(slot) for slot in range(self.slots)]
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters summed over every worker"""
+        totals = dict.fromkeys(COUNTER_FIELDS, 0)
+        for row in self.per_slot():
+            for field, value in row.items():
+                totals[field] += value
+        return totals
+
+    def close(self) -> None:
+        self._cells.release()
+        if self._shm is not None:
+            self._shm.close()
+
+    def unlink(self) -> None:
+        """Free the shared block (creator only, after every worker exited)"""
+        if self._shm is not None:
+            self._shm.unlink()
+
+
+_counters = SharedCounters.local()
+
+
+def counters() -> SharedCounters:
+    """The counters this process writes to"""
+    return _counters
+
+
+def use_counters(shared: SharedCounters) -> None:
+    """Make this process count into shared (e.g. a worker's slot)"""
+    global _counters
+    _counters = shared
@@ -0,0 +1,340 @@
+"""Streaming export of saved sessions to JSONL, CSV or Parquet
+
+Sessions are walked lazily in a fixed order (flat-layout files, then shards,
+each sorted by name), decoded on a thread pool with a bounded window of
+files in flight, and written in chunks. Memory stays bounded by the window
+and the chunk size whatever the size of the checkpoints directory.
+
+After each chunk is on disk a cursor file next to the output records the
+last exported session and the output size, so an interrupted export can
+resume where it stopped instead of starting over.
+"""
+
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from .session_store import SessionStore, _is_shard_dir
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+# Columns written for every session, in order
+EXPORT_FIELDS = (
+    "name",
+    "session_id",
+    "number_games_played",
+    "word_games_played",
+    "number_wins",
+    "word_wins",
+    "interrupted",
+    "resumable",
+    "current_game",
+    "last_checkpoint",
+    "checkpoint_data",
+)
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+# Position of a session in export order: (shard dir, name), "" for flat files
+Position = Tuple[str, str]
+
+
+def iter_positions(
+    store: SessionStore, after: Optional[Position] = None
+) -> Iterator[Tuple[Position, str]]:
+    """Lazily yield (position, path) for every session, in export order
+
+    Only one directory listing is held at a time. With after, everything up
+    to and including that position is skipped without being listed.
+    """
+
+    def files(directory: str, shard: str) -> Iterator[Tuple[Position, str]]:
+        with os.scandir(directory) as it:
+            names = sorted(
+                entry.name[: -len(".json")]
+                for entry in it
+                if SessionStore._is_session_file(entry)
+            )
+        for name in names:
+            position = (shard, name)
+            if after is None or position > after:
+                yield position, os.path.join(directory, f"{name}.json")
+
+    def shard_dirs(directory: str) -> List[str]:
+        with os.scandir(directory) as it:
+            return sorted(e.name for e in it if _is_shard_dir(e.name) and e.is_dir())
+
+    if after is None or after[0] == "":
+        yield from files(store.directory, "")
+
+    for level1 in shard_dirs(store.directory):
+        if after is not None and level1 < after[0][:2]:
+            continue
+        for level2 in shard_dirs(os.path.join(store.directory, level1)):
+            shard = f"{level1}/{level2}"
+            if after is not None and shard < after[0]:
+                continue
+            yield from files(os.path.join(store.directory, level1, level2), shard)
+
+
+def session_record(name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a saved session into an export row"""
+    record = {field: data.get(field) for field in EXPORT_FIELDS}
+    record["name"] = name
+    return record
+
+
+def _decode(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Evicted or rewritten mid-export, or unreadable; skip it
+        return None
+
+
+def iter_records(
+    items: Iterable[Tuple[Any, str]], workers: int = 4, window: int = 64
+) -> Iterator[Tuple[Any, Optional[Dict[str, Any]]]]:
+    """Decode (key, path) items on a thread pool, yielding (key, data) in order
+
+    At most window files are in flight; data is None for unreadable files.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for key, path in items:
+            pending.append((key, pool.submit(_decode, path)))
+            if len(pending) >= window:
+                key, future = pending.popleft()
+                yield key, future.result()
+        while pending:
+            key, future = pending.popleft()
+            yield key, future.result()
+
+
+class _JsonlWriter:
+    def __init__(self, path: Optional[str], append: bool):
+        self.file = open(path, "a" if append else "w") if path else None
+
+    def write_chunk(self, rows: List[Dict[str, Any]]) -> None:
+        out = self.file or sys.stdout
+        out.write("".join(json.dumps(row) + "\n" for row in rows))
+
+    def commit(self) -> int:
+        return _sync(self.file)
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+
+
+class _CsvWriter:
+    def __init__(self, path: Optional[str], append: bool):
+        self.file = open(path, "a" if append else "w", newline="") if path else None
+        self.writer = csv.DictWriter(self.file or sys.stdout, fieldnames=EXPORT_FIELDS)
+        if not append:
+            self.writer.writeheader()
+
+    def write_chunk(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            data = row["checkpoint_data"]
+            encoded = json.dumps(data) if data is not None else None
+            row = dict(row, checkpoint_data=encoded)
+            self.writer.writerow(row)
+
+    def commit(self) -> int:
+        return _sync(self.file)
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+
+
+class _ParquetWriter:
+    """One Parquet file per chunk (`part-NNNNN.parquet`) in an output directory
+
+    Each part is complete on disk before the cursor moves past it, so an
+    interrupted export never leaves a file without its footer.
+    """
+
+    def __init__(self, path: str, parts: int):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.directory = path
+        self.parts = parts
+        os.makedirs(path, exist_ok=True)
+        self.schema = pyarrow.schema(
+            [
+                ("name", pyarrow.string()),
+                ("session_id", pyarrow.string()),
+                ("number_games_played", pyarrow.int64()),
+                ("word_games_played", pyarrow.int64()),
+                ("number_wins", pyarrow.int64()),
+                ("word_wins", pyarrow.int64()),
+                ("interrupted", pyarrow.bool_()),
+                ("resumable", pyarrow.bool_()),
+                ("current_game", pyarrow.string()),
+                ("last_checkpoint", pyarrow.string()),
+                ("checkpoint_data", pyarrow.string()),
+            ]
+        )
+
+    def write_chunk(self, rows: List[Dict[str, Any]]) -> None:
+        columns = {field: [row[field] for row in rows] for field in EXPORT_FIELDS}
+        columns["checkpoint_data"] = [
+            json.dumps(data) if data is not None else None
+            for data in columns["checkpoint_data"]
+        ]
+        table = pyarrow.Table.from_pydict(columns, schema=self.schema)
+        part = os.path.join(self.directory, f"part-{self.parts:05d}.parquet")
+        tmp = part + ".tmp"
+        pyarrow.parquet.write_table(table, tmp)
+        os.replace(tmp, part)
+        self.parts += 1
+
+    def commit(self) -> int:
+        return self.parts
+
+    def close(self) -> None:
+        pass
+
+
+def _sync(file) -> int:
+    """Flush file to disk and return its size (0 for stdout)"""
+    if file is None:
+        sys.stdout.flush()
+        return 0
+    file.flush()
+    os.fsync(file.fileno())
+    return file.tell()
+
+
+class SessionExporter:
+    """Exports saved sessions in bounded memory, resumable via a cursor file
+
+    output is a file for jsonl/csv (None writes to stdout, without a cursor)
+    and a directory of part files for parquet.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        output: Optional[str] = None,
+        fmt: str = "jsonl",
+        workers: int = 4,
+        chunk_size: int = 10000,
+    ):
+        if fmt not in FORMATS:
+            raise ValueError(
+                f"Unknown export format '{fmt}' (choose from {', '.join(FORMATS)})"
+            )
+        if fmt == "parquet" and not output:
+            raise ValueError("Parquet export needs an output directory")
+        self.store = store
+        self.output = output
+        self.format = fmt
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    @property
+    def cursor_path(self) -> Optional[str]:
+        return f"{self.output.rstrip(os.sep)}.cursor" if self.output else None
+
+    def read_cursor(self) -> Optional[Dict[str, Any]]:
+        """The cursor left by an interrupted export of this output, if any"""
+        if not self.cursor_path:
+            return None
+        try:
+            with open(self.cursor_path, "r") as f:
+                cursor = json.load(f)
+        except FileNotFoundError:
+            return None
+        if cursor.get("format") != self.format:
+            raise ValueError(
+                f"Cursor {self.cursor_path} belongs to a {cursor.get('format')} export"
+            )
+        return cursor
+
+    def _write_cursor(self, position: Position, rows: int, mark: int) -> None:
+        cursor = {
+            "format": self.format,
+            "position": list(position),
+            "rows": rows,
+            # Output size for jsonl/csv, part count for parquet
+            "mark": mark,
+        }
+        tmp = self.cursor_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(cursor, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.cursor_path)
+
+    def _open_writer(self, cursor: Optional[Dict[str, Any]]):
+        if self.format == "parquet":
+            return _ParquetWriter(self.output, cursor["mark"] if cursor else 0)
+        if cursor and self.output:
+            # Drop anything written after the last committed chunk
+            with open(self.output, "r+") as f:
+                f.truncate(cursor["mark"])
+        writer_class = _CsvWriter if self.format == "csv" else _JsonlWriter
+        return writer_class(self.output, append=cursor is not None)
+
+    def run(
+        self, resume: bool = False, names: Optional[List[str]] = None
+    ) -> Dict[str, int]:
+        """Export every session (or just names); returns row and skip counts
+
+        With resume, continue after the position in this output's cursor.
+        Exporting explicit names keeps no cursor.
+        """
+        cursor = self.read_cursor() if resume and not names else None
+        rows = cursor["rows"] if cursor else 0
+        skipped = 0
+
+        if names:
+            items = (
+                (("", name), self.store.locate(name) or self.store.path(name))
+                for name in names
+            )
+            track = False
+        else:
+            after = tuple(cursor["position"]) if cursor else None
+            items = iter_positions(self.store, after)
+            track = self.cursor_path is not None
+
+        writer = self._open_writer(cursor)
+        try:
+            chunk = []
+            for position, data in iter_records(items, self.workers, self.workers * 16):
+                if data is None:
+                    skipped += 1
+                else:
+                    chunk.append(session_record(position[1], data))
+                if len(chunk) >= self.chunk_size:
+                    rows += self._flush(writer, chunk, position, rows, track)
+                    chunk = []
+            if chunk:
+                rows += self._flush(writer, chunk, position, rows, track)
+        finally:
+            writer.close()
+
+        if track and os.path.exists(self.cursor_path):
+            # Finished: nothing left to resume
+            os.remove(self.cursor_path)
+        return {"rows": rows, "skipped": skipped}
+
+    def _flush(self, writer, chunk, position: Position, rows: int, track: bool) -> int:
+        writer.write_chunk(chunk)
+        mark = writer.commit()
+        if track:
+            self._write_cursor(position, rows + len(chunk), mark)
+        return len(chunk)
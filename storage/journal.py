@@ -0,0 +1,465 @@
+"""Append-only session journal with snapshot + replay recovery"""
+
+import copy
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+def _try_lock(file) -> bool:
+    """Take the exclusive advisory lock on an open file without blocking"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+class JournalInUse(RuntimeError):
+    """The session's journal is held open by another live process"""
+
+
+class _GroupCommitter(threading.Thread):
+    """Background thread that fsyncs every journal written since its last pass
+
+    Appends take a ticket for the next batch and wait until that batch is on
+    disk, so one fsync per file covers all sessions written in the interval.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name="journal-group-commit", daemon=True)
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._dirty = set()
+        self._next = 1
+        self._done = 0
+        self._stopping = False
+
+    def submit(self, log: "_SessionLog") -> int:
+        with self._cond:
+            self._dirty.add(log)
+            return self._next
+
+    def wait(self, ticket: int) -> None:
+        with self._cond:
+            while self._done < ticket and not self._stopping:
+                self._cond.wait()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            self._commit()
+            if self._stopping:
+                return
+
+    def _commit(self):
+        with self._cond:
+            batch, self._dirty = self._dirty, set()
+            ticket = self._next
+            self._next += 1
+
+        for log in batch:
+            try:
+                os.fsync(log.file.fileno())
+            except (OSError, ValueError):
+                # Closed concurrently; close() syncs the file itself
+                pass
+
+        with self._cond:
+            self._done = ticket
+            self._cond.notify_all()
+
+    def stop(self):
+        self._commit()
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+
+class _SessionLog:
+    """Open journal file and materialized state for one session"""
+
+    __slots__ = (
+        "session_id",
+        "file",
+        "seq",
+        "since_snapshot",
+        "state",
+        "boundary",
+        "lock",
+    )
+
+    def __init__(
+        self,
+        session_id: str,
+        file,
+        seq: int,
+        state: Dict[str, Any],
+        boundary: Optional[Dict[str, Any]] = None,
+    ):
+        self.session_id = session_id
+        self.file = file
+        self.seq = seq
+        self.since_snapshot = 0
+        self.state = state
+        # {"state", "inputs"}: the state at the last turn boundary and the
+        # inputs journaled since, which recovery replays
+        self.boundary = boundary
+        self.lock = threading.Lock()
+
+
+class SessionJournal:
+    """Append-only per-session journal of user inputs and node transitions
+
+    Each session gets `<id>.log` (JSON lines) and `<id>.snapshot.json`.
+    Transitions record only the state fields a node changed; every
+    `snapshot_every` transitions the materialized state is written as a new
+    snapshot and the log is truncated, which bounds replay length. Recovery
+    loads the snapshot and applies the log tail.
+
+    `record_boundary` marks the start of a turn (the game's menu). Recovery
+    hands back the state at the last boundary together with the inputs
+    journaled since, so a session that crashed mid-game can be replayed
+    up to where it stopped.
+
+    By default every append is fsynced. With `group_commit_ms` set, a
+    background thread fsyncs all dirty journals once per interval and
+    appends wait for that batch instead (for processes hosting many
+    sessions).
+
+    Several processes may share the directory. Every open log holds an
+    advisory lock on its file for as long as it is open, so a journal is
+    only treated as crashed (offered for recovery, or discarded) once no
+    live process holds it. Without fcntl the locks are skipped.
+    """
+
+    def __init__(
+        self,
+        directory: str = os.path.join("checkpoints", "journal"),
+        snapshot_every: int = 100,
+        group_commit_ms: Optional[float] = None,
+    ):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self._logs: Dict[str, _SessionLog] = {}
+        self._lock = threading.Lock()
+        self._committer = None
+        if group_commit_ms:
+            self._committer = _GroupCommitter(group_commit_ms / 1000.0)
+            self._committer.start()
+        os.makedirs(self.directory, exist_ok=True)
+
+    # -- paths -----------------------------------------------------------
+
+    def _log_path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.log")
+
+    def _snapshot_path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.snapshot.json")
+
+    # -- writing ---------------------------------------------------------
+
+    def record_input(self, session_id: str, prompt: str, value: Any) -> None:
+        """Journal a line of user input"""
+        if not session_id:
+            return
+        log = self._claim(session_id)
+        if log is not None:
+            self._append(log, {"type": "input", "prompt": prompt, "value": value})
+
+    def record_boundary(self, state: Dict[str, Any]) -> None:
+        """Mark the start of a turn that recovery can replay from"""
+        session_id = state.get("session_id")
+        if not session_id:
+            return
+        log = self._claim(session_id, state)
+        if log is None:
+            return
+        with log.lock:
+            changes = {
+                k: v
+                for k, v in state.items()
+                if k not in log.state or log.state[k] != v
+            }
+            if not changes and log.boundary is not None and not log.boundary["inputs"]:
+                # Same turn again (a streamed node re-run on resume)
+                return
+        self._append(log, {"type": "boundary", "changes": changes})
+
+    def record_transition(
+        self, node: str, before: Dict[str, Any], after: Dict[str, Any]
+    ) -> None:
+        """Journal the state fields a node changed"""
+        session_id = before.get("session_id")
+        if not session_id:
+            return
+
+        if after.get("session_id") != session_id:
+            # The node switched to another session (resume/load): the old
+            # journal is superseded and the new one starts from a snapshot
+            self.close(session_id)
+            new_id = after.get("session_id")
+            log = self._claim(new_id, dict(after)) if new_id else None
+            if log is not None:
+                with log.lock:
+                    log.state = dict(after)
+                    self._write_snapshot(log)
+            return
+
+        log = self._claim(session_id, before)
+        if log is None:
+            return
+        changes = {
+            k: v for k, v in after.items() if k not in before or before[k] != v
+        }
+        self._append(log, {"type": "transition", "node": node, "changes": changes})
+
+    def _append(self, log: _SessionLog, record: Dict[str, Any]) -> None:
+        with log.lock:
+            log.seq += 1
+            record["seq"] = log.seq
+            record["ts"] = time.time()
+            log.file.write(json.dumps(record) + "\n")
+            log.file.flush()
+
+            if record["type"] == "input":
+                if log.boundary is not None:
+                    log.boundary["inputs"].append(record["value"])
+            elif record["type"] == "boundary":
+                log.state.update(record["changes"])
+                log.boundary = {"state": copy.deepcopy(log.state), "inputs": []}
+            elif record["type"] == "transition":
+                log.state.update(record["changes"])
+                log.since_snapshot += 1
+                if log.since_snapshot >= self.snapshot_every:
+                    self._write_snapshot(log)
+                    return
+
+            if self._committer is None:
+                os.fsync(log.file.fileno())
+                return
+            ticket = self._committer.submit(log)
+
+        self._committer.wait(ticket)
+
+    def _write_snapshot(self, log: _SessionLog) -> None:
+        """Persist the materialized state and start an empty log (lock held)"""
+        path = self._snapshot_path(log.session_id)
+        # Per-process temp name: --workers processes share this directory
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"seq": log.seq, "state": log.state, "boundary": log.boundary}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        # Records up to log.seq are covered by the snapshot; if we crash
+        # before the truncate they are skipped on replay
+        log.file.seek(0)
+        log.file.truncate()
+        log.file.flush()
+        os.fsync(log.file.fileno())
+        log.since_snapshot = 0
+
+    def _open_log(
+        self, session_id: str, initial_state: Optional[Dict[str, Any]] = None
+    ) -> _SessionLog:
+        with self._lock:
+            log = self._logs.get(session_id)
+            if log is not None:
+                return log
+
+            # Locked before replaying, so no other process appends meanwhile
+            file = open(self._log_path(session_id), "a")
+            if not _try_lock(file):
+                file.close()
+                raise JournalInUse(session_id)
+
+            recovered = self._replay(session_id)
+            if recovered is not None:
+                state, seq, boundary = recovered
+            else:
+                state, seq = dict(initial_state or {"session_id": session_id}), 0
+                boundary = None
+            log = _SessionLog(session_id, file, seq, state, boundary)
+            if recovered is None:
+                # Give replay a baseline to apply the first transitions to
+                self._write_snapshot(log)
+            self._logs[session_id] = log
+            return log
+
+    def _claim(
+        self, session_id: str, initial_state: Optional[Dict[str, Any]] = None
+    ) -> Optional[_SessionLog]:
+        """The session's open log, or None while another process journals it
+
+        Happens when two processes resumed the same saved session: the one
+        that opened the journal first keeps it.
+        """
+        try:
+            return self._open_log(session_id, initial_state)
+        except JournalInUse:
+            return None
+
+    def close(self, session_id: str, discard: bool = True) -> None:
+        """Close a session's journal, deleting it when the session ended cleanly
+
+        A journal this process does not hold is only deleted if no other
+        process holds it either.
+        """
+        with self._lock:
+            log = self._logs.pop(session_id, None)
+        if log is None:
+            if discard:
+                self.discard(session_id)
+            return
+
+        with log.lock:
+            log.file.flush()
+            os.fsync(log.file.fileno())
+            if discard:
+                # Still locked, so no other process can claim it meanwhile
+                self._remove(session_id)
+            log.file.close()
+
+    def discard(self, session_id: str) -> bool:
+        """Delete a journal no live process holds; False if one does"""
+        try:
+            file = open(self._log_path(session_id), "a")
+        except FileNotFoundError:
+            # Directory removed: nothing left to discard
+            return True
+        with file:
+            if not _try_lock(file):
+                return False
+            self._remove(session_id)
+        return True
+
+    def _remove(self, session_id: str) -> None:
+        for path in (self._log_path(session_id), self._snapshot_path(session_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self) -> None:
+        """Flush and close every open journal, keeping them on disk"""
+        for session_id in list(self._logs):
+            self.close(session_id, discard=False)
+        if self._committer is not None:
+            self._committer.stop()
+
+    # -- recovery --------------------------------------------------------
+
+    def _replay(
+        self, session_id: str
+    ) -> Optional[Tuple[Dict[str, Any], int, Optional[Dict[str, Any]]]]:
+        try:
+            with open(self._snapshot_path(session_id), "r") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            # Never journaled, or discarded concurrently by close()
+            return None
+        state, seq = snapshot["state"], snapshot["seq"]
+        boundary = snapshot.get("boundary")
+
+        try:
+            with open(self._log_path(session_id), "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final write from a crash
+                        break
+                    if record["seq"] <= snapshot["seq"]:
+                        continue
+                    seq = record["seq"]
+                    if record["type"] == "input":
+                        if boundary is not None:
+                            boundary["inputs"].append(record["value"])
+                    elif record["type"] == "boundary":
+                        state.update(record["changes"])
+                        boundary = {"state": copy.deepcopy(state), "inputs": []}
+                    elif record["type"] == "transition":
+                        state.update(record["changes"])
+        except FileNotFoundError:
+            pass
+
+        return state, seq, boundary
+
+    def recover(self, session_id: str) -> Optional[Tuple[Dict[str, Any], List[Any]]]:
+        """Claim a crashed session's journal and rebuild it for replay
+
+        Returns the state at the session's last turn boundary and the inputs
+        journaled after it, in order; replaying them brings the session
+        back to where it stopped. Journals without a boundary give their
+        last state and no inputs. The journal is reset to that state and
+        stays open (and locked) for the replayed turn to be journaled
+        again. Returns None if there is nothing to recover or another
+        process claimed it first.
+        """
+        if not os.path.exists(self._snapshot_path(session_id)):
+            return None
+        try:
+            log = self._open_log(session_id)
+        except JournalInUse:
+            return None
+        with log.lock:
+            if log.boundary is not None:
+                state, inputs = log.boundary["state"], log.boundary["inputs"]
+            else:
+                state, inputs = log.state, []
+            state, inputs = copy.deepcopy(state), list(inputs)
+            log.state, log.boundary = copy.deepcopy(state), None
+            self._write_snapshot(log)
+        return state, inputs
+
+    def _held_elsewhere(self, session_id: str) -> bool:
+        try:
+            with open(self._log_path(session_id), "r") as file:
+                # Shared with other probes, exclusive with a live writer
+                if fcntl is None:
+                    return False
+                try:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return True
+                return False
+        except FileNotFoundError:
+            # A live writer opens its log before the first snapshot
+            return False
+
+    def recoverable_sessions(self) -> List[str]:
+        """Crashed session ids with a journal on disk, most recently written first
+
+        Journals are deleted when a session ends cleanly, and a live one is
+        locked by the process writing it, so an unlocked journal belongs to
+        a session that crashed or was killed.
+        """
+        suffix = ".snapshot.json"
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(suffix):
+                continue
+            session_id = entry.name[: -len(suffix)]
+            if session_id in self._logs or self._held_elsewhere(session_id):
+                continue
+            log_path = self._log_path(session_id)
+            try:
+                mtime = entry.stat().st_mtime
+                if os.path.exists(log_path):
+                    mtime = max(mtime, os.path.getmtime(log_path))
+            except FileNotFoundError:
+                # Closed and discarded while we looked
+                continue
+            found.append((mtime, session_id))
+        return [session_id for _, session_id in sorted(found, reverse=True)]
@@ -0,0 +1,233 @@
+"""Size-budgeted retention with LRU eviction for saved sessions"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, List, Tuple
+
+from .session_store import SessionStore
+
+# Temp files older than this belong to a writer that died mid-save
+STALE_TEMP_SECONDS = 3600
+
+
+def is_pinned(name: str) -> bool:
+    """Named saves are pinned; only auto-named `session_<id>` saves are evictable"""
+    return not name.startswith("session_")
+
+
+@dataclass
+class RetentionPolicy:
+    """Budget for the checkpoints directory; None means unlimited"""
+
+    max_bytes: Optional[int] = None
+    max_sessions: Optional[int] = None
+    interval: float = 300.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes is not None or self.max_sessions is not None
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        """Read CHECKPOINT_MAX_BYTES, CHECKPOINT_MAX_SESSIONS, CHECKPOINT_GC_INTERVAL"""
+
+        def read(var, cast):
+            value = os.environ.get(var, "").strip()
+            return cast(value) if value else None
+
+        interval = read("CHECKPOINT_GC_INTERVAL", float)
+        return cls(
+            max_bytes=read("CHECKPOINT_MAX_BYTES", int),
+            max_sessions=read("CHECKPOINT_MAX_SESSIONS", int),
+            interval=interval if interval is not None else cls.interval,
+        )
+
+
+@dataclass
+class GcReport:
+    """What a collection pass found and evicted (or would evict)"""
+
+    dry_run: bool
+    sessions: int = 0
+    total_bytes: int = 0
+    pinned: int = 0
+    # (name, size, last access) in eviction order
+    evicted: List[Tuple[str, int, float]] = field(default_factory=list)
+    stale_temp_files: int = 0
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return sum(size for _, size, _ in self.evicted)
+
+    def lines(self, policy: RetentionPolicy) -> List[str]:
+        verb = "Would evict" if self.dry_run else "Evicted"
+        budget = []
+        if policy.max_sessions is not None:
+            budget.append(f"{policy.max_sessions} sessions")
+        if policy.max_bytes is not None:
+            budget.append(f"{policy.max_bytes} bytes")
+
+        lines = [
+            f"Saved sessions: {self.sessions} "
+            f"({self.total_bytes} bytes, {self.pinned} pinned)",
+            f"Budget: {', '.join(budget) if budget else 'unlimited'}",
+            f"{verb} {len(self.evicted)} session(s), "
+            f"reclaiming {self.reclaimed_bytes} bytes",
+        ]
+        for name, size, accessed in self.evicted:
+            last_access = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(accessed))
+            lines.append(f"  - {name}.json ({size} bytes, last access {last_access})")
+        if self.stale_temp_files:
+            verb = "Would remove" if self.dry_run else "Removed"
+            lines.append(f"{verb} {self.stale_temp_files} stale temp file(s)")
+        return lines
+
+
+class RetentionManager:
+    """Keeps the checkpoints directory within its RetentionPolicy
+
+    Evicts the least recently accessed unpinned sessions until the budget
+    holds, and clears temp files abandoned by crashed writers. Runs on demand
+    (`collect`) or periodically on a background thread (`start`); `poke`
+    asks the background thread for an early pass after a save. Besides the
+    named saves, `pin` protects saves this process still needs (a hosted
+    session's pause save while it is hibernated).
+    """
+
+    def __init__(self, store: SessionStore, policy: RetentionPolicy):
+        self.store = store
+        self.policy = policy
+        self._pinned = set()
+        self._pinned_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def pin(self, name: str) -> None:
+        """Keep session name out of eviction until unpin"""
+        with self._pinned_lock:
+            self._pinned.add(name)
+
+    def unpin(self, name: str) -> None:
+        with self._pinned_lock:
+            self._pinned.discard(name)
+
+    def is_pinned(self, name: str) -> bool:
+        if is_pinned(name):
+            return True
+        with self._pinned_lock:
+            return name in self._pinned
+
+    def collect(self, dry_run: bool = False) -> GcReport:
+        """Run one retention pass"""
+        report = GcReport(dry_run=dry_run)
+        candidates = []
+
+        for name, st in self.store.entries():
+            report.sessions += 1
+            report.total_bytes += st.st_size
+            if self.is_pinned(name):
+                report.pinned += 1
+            else:
+                candidates.append((st.st_atime, name, st.st_size, st.st_mtime))
+
+        # Least recently accessed first
+        candidates.sort()
+        sessions, total_bytes = report.sessions, report.total_bytes
+        for accessed, name, size, mtime in candidates:
+            if not self._over_budget(sessions, total_bytes):
+                break
+            if not dry_run and not self._evict(name, mtime):
+                continue
+            report.evicted.append((name, size, accessed))
+            sessions -= 1
+            total_bytes -= size
+
+        cutoff = time.time() - STALE_TEMP_SECONDS
+        for path, st in self.store.temp_files():
+            if st.st_mtime < cutoff:
+                report.stale_temp_files += 1
+                if not dry_run:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+        return report
+
+    def _over_budget(self, sessions: int, total_bytes: int) -> bool:
+        policy = self.policy
+        return (policy.max_sessions is not None and sessions > policy.max_sessions) or (
+            policy.max_bytes is not None and total_bytes > policy.max_bytes
+        )
+
+    def _evict(self, name: str, planned_mtime: float) -> bool:
+        """Delete a session unless it was rewritten since the pass scanned it"""
+        with self.store.lock(name):
+            path = self.store.locate(name)
+            try:
+                if (
+                    path is None
+                    or os.stat(path).st_mtime != planned_mtime
+                    or self.is_pinned(name)
+                ):
+                    return False
+                self.store.cache.invalidate(path)
+                os.remove(path)
+            except FileNotFoundError:
+                return False
+        return True
+
+    # -- background compaction -------------------------------------------
+
+    def start(self) -> None:
+        """Run collection passes on a daemon thread every policy.interval"""
+        if self._thread is not None or not self.policy.enabled:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="checkpoint-retention", daemon=True
+        )
+        self._thread.start()
+
+    def poke(self) -> None:
+        """Ask the background thread for a pass soon"""
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.policy.interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self.collect()
+            except OSError:
+                # Retention is best effort; try again next pass
+                pass
+
+
+# Directory -> the manager shared by every store of this process using it
+_shared: Dict[str, RetentionManager] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_retention(store: SessionStore) -> RetentionManager:
+    """The process's retention manager for store's directory
+
+    Created with the environment's policy and started on first use, so a
+    process runs one background pass per checkpoints directory however
+    many agents it builds.
+    """
+    key = os.path.realpath(store.directory)
+    with _shared_lock:
+        manager = _shared.get(key)
+        if manager is None:
+            manager = _shared[key] = RetentionManager(store, RetentionPolicy.from_env())
+            manager.start()
+    return manager
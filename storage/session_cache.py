@@ -0,0 +1,125 @@
+"""In-memory LRU cache of decoded saved sessions
+
+`/resume`, `/load`, hibernated server sessions and the startup resume check
+all read whole session files. The cache keeps the decoded contents of the
+most recently used files keyed by path, together with the (inode, mtime,
+size) the file had when it was read. A load only stats the file: if the
+stat still matches, the cached copy is returned without opening or parsing
+it, so a file rewritten by another process (always a new inode, since
+writers publish by rename) is never served stale. The store's own writes
+invalidate their entry directly.
+"""
+
+import marshal
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+# (inode, mtime in ns, size) a cached copy was read at
+Signature = Tuple[int, int, int]
+
+
+def signature(st: os.stat_result) -> Signature:
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+@dataclass
+class _Entry:
+    signature: Signature
+    # marshal of the decoded value: every load gets a fresh copy, built
+    # several times faster than json parses the file
+    blob: bytes
+
+
+class SessionCache:
+    """Bounded LRU of decoded session files, validated by stat
+
+    Bounded by entry count and by the bytes held for cached copies;
+    either limit may be None. max_entries=0 disables caching.
+    Callers always get their own copy, so mutating a loaded state never
+    changes what the next load returns.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = 256,
+        max_bytes: Optional[int] = 32 * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SessionCache":
+        """Read CHECKPOINT_CACHE_ENTRIES and CHECKPOINT_CACHE_BYTES"""
+
+        def read(var, default):
+            value = os.environ.get(var, "").strip()
+            return int(value) if value else default
+
+        return cls(
+            max_entries=read("CHECKPOINT_CACHE_ENTRIES", 256),
+            max_bytes=read("CHECKPOINT_CACHE_BYTES", 32 * 1024 * 1024),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries != 0 and self.max_bytes != 0
+
+    def get(self, path: str, st: os.stat_result) -> Optional[Dict[str, Any]]:
+        """A copy of path's contents if cached at this stat, else None"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry.signature != signature(st):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+        return marshal.loads(entry.blob)
+
+    def put(self, path: str, st: os.stat_result, data: Dict[str, Any]) -> None:
+        """Remember data as path's contents at stat st"""
+        if not self.enabled:
+            return
+        entry = _Entry(signature(st), marshal.dumps(data))
+        if self.max_bytes is not None and len(entry.blob) > self.max_bytes:
+            self.invalidate(path)
+            return
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= len(old.blob)
+            self._entries[path] = entry
+            self._bytes += len(entry.blob)
+            while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.blob)
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= len(old.blob)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "session_cache_entries": len(self._entries),
+                "session_cache_bytes": self._bytes,
+                "session_cache_hits": self.hits,
+                "session_cache_misses": self.misses,
+            }
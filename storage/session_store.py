@@ -0,0 +1,306 @@
+"""Saved-session files shared safely between processes"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, Tuple, Optional
+
+from .counters import counters
+from .session_cache import SessionCache
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+_HEX = frozenset("0123456789abcdef")
+
+# Session names become file names: nothing that could leave the directory
+VALID_NAME = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def check_name(name: str) -> str:
+    """name, if it is a valid session name; ValueError otherwise"""
+    if not VALID_NAME.fullmatch(name):
+        raise ValueError(
+            f"invalid session name {name[:64]!r}: use 1-64 letters, digits, '_' or '-'"
+        )
+    return name
+
+
+def _is_shard_dir(name: str) -> bool:
+    return len(name) == 2 and set(name) <= _HEX
+
+
+class SessionStore:
+    """Saved sessions as `<name>.json` files in the checkpoints directory
+
+    Files are sharded two levels deep by a hash of the session name
+    (`ab/cd/<name>.json`), so resolving a known session is O(1) and no
+    directory grows past a few thousand entries. Files from the old flat
+    layout stay readable and are moved into their shard when loaded, saved
+    or swept by `migrate_flat`, so a directory migrates while in use.
+
+    Writers serialize per session through advisory locks striped over a
+    fixed set of lock files, and publish each version by writing a temp
+    file and atomically renaming it over the old one. Readers take no lock:
+    they always open a complete file, so they never block writers and never
+    see a torn write.
+
+    On platforms without fcntl the inter-process locks are skipped and only
+    threads in this process are serialized; publication stays atomic.
+
+    Decoded sessions are kept in a SessionCache (sized from the environment
+    unless one is passed), so loading an unchanged file costs one stat.
+
+    A read_only store never creates, moves or touches anything on disk:
+    flat files are read in place and a missing directory lists as empty.
+    """
+
+    def __init__(
+        self,
+        directory: str = "checkpoints",
+        lock_stripes: int = 64,
+        cache: Optional[SessionCache] = None,
+        read_only: bool = False,
+    ):
+        self.directory = directory
+        self.lock_stripes = lock_stripes
+        self.cache = cache if cache is not None else SessionCache.from_env()
+        self._lock_dir = os.path.join(directory, ".locks")
+        self._thread_locks = [threading.Lock() for _ in range(lock_stripes)]
+        self.read_only = read_only
+        if not read_only:
+            os.makedirs(self._lock_dir, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        """Sharded path of the file holding session `name`"""
+        check_name(name)
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest[2:4], f"{name}.json")
+
+    def flat_path(self, name: str) -> str:
+        """Pre-sharding path of session `name`"""
+        check_name(name)
+        return os.path.join(self.directory, f"{name}.json")
+
+    def locate(self, name: str) -> Optional[str]:
+        """Path session `name` currently lives at, or None"""
+        for path in (self.path(name), self.flat_path(name), self.path(name)):
+            # Sharded path checked twice: a migration may move the file
+            # between the first two checks
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _stripe(self, name: str) -> int:
+        return zlib.crc32(name.encode("utf-8")) % self.lock_stripes
+
+    @contextmanager
+    def lock(self, name: str):
+        """Hold the writer lock for session `name`"""
+        stripe = self._stripe(name)
+        with self._thread_locks[stripe]:
+            if fcntl is None:
+                yield
+                return
+            lock_path = os.path.join(self._lock_dir, f"stripe-{stripe:03d}.lock")
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def _publish(self, name: str, data: Dict[str, Any]) -> str:
+        """Write data to a private temp file and swap it in (lock held)"""
+        path = self.path(name)
+        shard_dir = os.path.dirname(path)
+        os.makedirs(shard_dir, exist_ok=True)
+        tmp_path = os.path.join(
+            shard_dir, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            counters().add("sessions_saved")
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        # Stat validation would catch the new inode too; dropping the copy
+        # here frees it at once
+        self.cache.invalidate(path)
+
+        # The sharded copy now wins; drop any pre-sharding file
+        try:
+            os.remove(self.flat_path(name))
+        except FileNotFoundError:
+            pass
+        return path
+
+    def _migrate(self, name: str) -> None:
+        """Move a flat-layout file into its shard"""
+        with self.lock(name):
+            flat = self.flat_path(name)
+            if not os.path.exists(flat):
+                return
+            path = self.path(name)
+            if os.path.exists(path):
+                os.remove(flat)
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(flat, path)
+
+    def migrate_flat(self, limit: Optional[int] = None) -> int:
+        """Move up to limit flat-layout sessions into shards; returns the count"""
+        moved = 0
+        for entry in os.scandir(self.directory):
+            if limit is not None and moved >= limit:
+                break
+            if self._is_session_file(entry):
+                try:
+                    self._migrate(entry.name[: -len(".json")])
+                except FileNotFoundError:
+                    continue
+                moved += 1
+        return moved
+
+    def start_migration(self) -> None:
+        """Sweep flat-layout sessions into shards on a daemon thread"""
+        threading.Thread(
+            target=self.migrate_flat, name="checkpoint-migration", daemon=True
+        ).start()
+
+    def save(self, name: str, data: Dict[str, Any]) -> str:
+        """Atomically replace session `name` with data"""
+        with self.lock(name):
+            return self._publish(name, data)
+
+    def update(
+        self, name: str, mutate: Callable[[Dict[str, Any]], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Read-modify-write session `name` without losing concurrent updates"""
+        with self.lock(name):
+            try:
+                data = self.load(name)
+            except FileNotFoundError:
+                data = {}
+            data = mutate(data)
+            self._publish(name, data)
+            return data
+
+    def load(self, name: str, touch: bool = True) -> Dict[str, Any]:
+        """Read the latest published version of session `name` (lock-free)
+
+        touch records the access time that retention uses for LRU eviction.
+        """
+        path = self.path(name)
+        try:
+            data = self._read(path)
+        except FileNotFoundError:
+            path = self.locate(name)
+            if path is None:
+                raise
+            data = self._read(path)
+            if path == self.flat_path(name) and not self.read_only:
+                self.cache.invalidate(path)
+                self._migrate(name)
+                path = self.path(name)
+        if touch and not self.read_only:
+            self._touch(path)
+        return data
+
+    def _read(self, path: str) -> Dict[str, Any]:
+        """Decoded contents of path, from the cache while its stat is unchanged"""
+        if self.cache.enabled:
+            data = self.cache.get(path, os.stat(path))
+            if data is not None:
+                return data
+        with open(path, "r") as f:
+            # Stat the open file: it is the exact version being parsed
+            st = os.fstat(f.fileno())
+            data = json.load(f)
+        self.cache.put(path, st, data)
+        return data
+
+    def _touch(self, path: str) -> None:
+        # Set atime explicitly: noatime/relatime mounts would not record it.
+        # mtime is kept to the nanosecond so cached copies stay valid
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except OSError:
+            pass
+
+    def remove(self, name: str) -> None:
+        """Delete session `name` (lock held by caller or not needed)"""
+        path = self.locate(name)
+        if path is None:
+            raise FileNotFoundError(self.path(name))
+        self.cache.invalidate(path)
+        os.remove(path)
+
+    @staticmethod
+    def _is_session_file(entry: os.DirEntry) -> bool:
+        return (
+            entry.name.endswith(".json")
+            and not entry.name.startswith(".")
+            and entry.is_file()
+        )
+
+    def _walk(self) -> Iterator[os.DirEntry]:
+        """Lazily yield every file in the flat directory and all shards"""
+        if not os.path.isdir(self.directory):
+            return
+        with os.scandir(self.directory) as top:
+            for entry in top:
+                if entry.is_file():
+                    yield entry
+                elif _is_shard_dir(entry.name) and entry.is_dir():
+                    with os.scandir(entry.path) as level1:
+                        for sub in level1:
+                            if _is_shard_dir(sub.name) and sub.is_dir():
+                                with os.scandir(sub.path) as level2:
+                                    yield from level2
+
+    def entries(self) -> Iterator[Tuple[str, os.stat_result]]:
+        """Lazily yield (name, stat) for every saved session"""
+        for entry in self._walk():
+            if self._is_session_file(entry):
+                try:
+                    yield entry.name[: -len(".json")], entry.stat()
+                except FileNotFoundError:
+                    continue
+
+    def names(self) -> Iterator[str]:
+        """Lazily yield the name of every saved session"""
+        for name, _ in self.entries():
+            yield name
+
+    def has_flat_sessions(self) -> bool:
+        """Whether any session still uses the pre-sharding layout"""
+        if not os.path.isdir(self.directory):
+            return False
+        with os.scandir(self.directory) as top:
+            return any(self._is_session_file(entry) for entry in top)
+
+    def temp_files(self) -> Iterator[Tuple[str, os.stat_result]]:
+        """(path, stat) for temp files left by writers"""
+        for entry in self._walk():
+            if entry.name.startswith(".") and entry.name.endswith(".tmp"):
+                try:
+                    yield entry.path, entry.stat()
+                except FileNotFoundError:
+                    continue
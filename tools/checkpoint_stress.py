@@ -0,0 +1,137 @@
+"""Multi-process stress test for the shared checkpoints directory
+
+Run from the repository root:
+
+    python -m tools.checkpoint_stress --processes 16 --iterations 500
+
+Every worker process mixes whole-file saves, lock-free loads and
+read-modify-write updates against a small set of shared sessions. The run
+fails (exit status 1) if a reader ever sees a torn or inconsistent file, or
+if any read-modify-write update is lost.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from storage import SessionStore
+
+
+def _digest(payload):
+    body = {k: v for k, v in payload.items() if k != "digest"}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+def _worker(directory, worker_id, iterations, sessions, seed):
+    rng = random.Random(seed)
+    store = SessionStore(directory)
+    errors = []
+    updates = {}
+
+    for i in range(iterations):
+        op = rng.random()
+        blob = f"stress_blob_{rng.randrange(sessions)}"
+
+        if op < 0.4:
+            payload = {
+                "session_id": blob,
+                "writer": worker_id,
+                "seq": i,
+                # Varying sizes make a torn write visible as a short file
+                "padding": "x" * rng.randrange(0, 20000),
+            }
+            payload["digest"] = _digest(payload)
+            store.save(blob, payload)
+
+        elif op < 0.8:
+            try:
+                payload = store.load(blob)
+            except FileNotFoundError:
+                continue
+            except ValueError as e:
+                errors.append(f"torn read of {blob}: {e}")
+                continue
+            if payload.get("digest") != _digest(payload):
+                errors.append(f"inconsistent read of {blob}")
+
+        else:
+            counter = f"stress_counter_{rng.randrange(sessions)}"
+
+            def bump(data):
+                data["count"] = data.get("count", 0) + 1
+                return data
+
+            store.update(counter, bump)
+            updates[counter] = updates.get(counter, 0) + 1
+
+    return errors, updates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--dir", help="checkpoints directory to use (default: a temp dir)"
+    )
+    args = parser.parse_args(argv)
+
+    directory = args.dir or tempfile.mkdtemp(prefix="checkpoint_stress_")
+    started = time.time()
+
+    with multiprocessing.Pool(args.processes) as pool:
+        results = pool.starmap(
+            _worker,
+            [
+                (directory, n, args.iterations, args.sessions, args.seed + n)
+                for n in range(args.processes)
+            ],
+        )
+
+    errors = [e for worker_errors, _ in results for e in worker_errors]
+    expected = {}
+    for _, updates in results:
+        for counter, count in updates.items():
+            expected[counter] = expected.get(counter, 0) + count
+
+    store = SessionStore(directory)
+    for counter, count in sorted(expected.items()):
+        actual = store.load(counter).get("count")
+        if actual != count:
+            errors.append(f"lost updates on {counter}: expected {count}, got {actual}")
+
+    leftovers = [path for path, _ in store.temp_files()]
+    if leftovers:
+        errors.append(f"temp files left behind: {leftovers}")
+
+    elapsed = time.time() - started
+    total_ops = args.processes * args.iterations
+    print(
+        f"{args.processes} processes x {args.iterations} ops "
+        f"({total_ops} total) in {elapsed:.2f}s"
+    )
+
+    if not args.dir:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if errors:
+        print(f"FAILED with {len(errors)} error(s):")
+        for error in errors[:20]:
+            print(f"  - {error}")
+        return 1
+
+    print("OK: no torn reads, no lost updates")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
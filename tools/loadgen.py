@@ -0,0 +1,301 @@
+"""Synthetic load generator for server mode
+
+Run from the repository root, either against a running server or one it
+starts itself in a scratch directory:
+
+    python -m tools.loadgen --spawn --players 1000 --duration 60
+    python -m tools.loadgen --port 7777 --players 200 --think-time 0.5
+
+Each virtual player connects, plays a randomly planned session (number and
+word games, /status, /pause, an interrupted game) with scripted
+answers and think time, exits, and starts over until the run ends. The
+report is JSON: throughput plus p50/p95/p99 latency per command.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = (
+    "apple", "banana", "car", "dog", "elephant", "flower", "guitar", "house",
+    "island", "jungle", "kite", "lion", "mountain", "notebook", "ocean",
+    "piano", "queen", "robot", "sunset", "tree",
+)  # fmt: skip
+
+# Menu steps a session plan is drawn from (/resume, /load, /list and /gc are
+# off in server mode)
+STEPS = ("number", "number", "word", "word", "/status", "/pause", "interrupt")
+
+GUESS = re.compile(r"Is your number (\d+)\?")
+WORD_GUESS = re.compile(r"I think your word is: (\w+)")
+
+
+class Stats:
+    """Latency samples per command plus run counters"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.sessions_completed = 0
+        # Replies of {"error": "busy"} from admission control
+        self.rejected = 0
+
+    def record(self, command: str, seconds: float) -> None:
+        self.latencies[command].append(seconds)
+
+    def report(self, elapsed: float, config: Dict) -> Dict:
+        def percentile(samples: List[float], pct: float) -> float:
+            index = min(len(samples) - 1, max(0, round(pct / 100 * len(samples)) - 1))
+            return round(samples[index] * 1000, 3)
+
+        commands = {}
+        for command, samples in sorted(self.latencies.items()):
+            samples.sort()
+            commands[command] = {
+                "count": len(samples),
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "max_ms": round(samples[-1] * 1000, 3),
+            }
+
+        requests = sum(len(s) for s in self.latencies.values())
+        return {
+            "config": config,
+            "elapsed_s": round(elapsed, 3),
+            "requests": requests,
+            "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+            "sessions_completed": self.sessions_completed,
+            "rejected": self.rejected,
+            "errors": dict(self.errors),
+            "commands": commands,
+        }
+
+
+class Player:
+    """One virtual player driving sessions over a single connection each"""
+
+    def __init__(self, args, stats: Stats, rng: random.Random, deadline: float):
+        self.args = args
+        self.stats = stats
+        self.rng = rng
+        self.deadline = deadline
+
+    async def think(self) -> None:
+        if self.args.think_time > 0:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.args.think_time))
+
+    async def run(self) -> None:
+        while time.monotonic() < self.deadline:
+            try:
+                await self.play_session()
+                self.stats.sessions_completed += 1
+            except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                self.stats.errors[type(e).__name__] += 1
+                await asyncio.sleep(0.1)
+
+    async def play_session(self) -> None:
+        started = time.perf_counter()
+        reader, writer = await asyncio.open_connection(self.args.host, self.args.port)
+        try:
+            reply = await self._receive(reader)
+            self.stats.record("connect", time.perf_counter() - started)
+            if reply.get("error") == "busy":
+                self.stats.rejected += 1
+                await self._back_off(reply)
+                return
+
+            plan = self.rng.sample(STEPS, self.rng.randint(1, len(STEPS)))
+            secret = word = None
+            interrupt_pending = False
+
+            while not reply.get("end"):
+                prompt = reply.get("prompt", "")
+                output = reply.get("output", "")
+
+                if prompt.startswith("Choice"):
+                    step = ""
+                    if plan and time.monotonic() < self.deadline:
+                        step = plan.pop(0)
+                    if step in ("number", "interrupt"):
+                        secret = self.rng.randint(1, 100)
+                        interrupt_pending = step == "interrupt"
+                        line, command = "1", "menu_number"
+                    elif step == "word":
+                        line, command = "2", "menu_word"
+                    elif step:
+                        line, command = step, step
+                    else:
+                        line, command = "", "exit"
+                elif prompt.startswith("Enter 'yes'"):
+                    if interrupt_pending:
+                        interrupt_pending = False
+                        line, command = "quit", "interrupt"
+                    else:
+                        guess = int(GUESS.findall(output)[-1])
+                        line = "yes" if guess == secret else (
+                            "higher" if secret > guess else "lower"
+                        )
+                        command = "number_answer"
+                elif prompt.startswith("Enter your chosen word"):
+                    word = self.rng.choice(WORDS)
+                    line, command = word, "word_pick"
+                elif prompt.startswith("Answer"):
+                    line, command = self.rng.choice(("yes", "no")), "word_answer"
+                elif prompt.startswith("Was I correct"):
+                    guessed = WORD_GUESS.findall(output)
+                    line = "yes" if guessed and guessed[-1] == word else "no"
+                    command = "word_verdict"
+                elif prompt.startswith("Choose (1-3)"):
+                    line, command = "3", "interrupt_continue"
+                elif prompt.startswith("-- more --"):
+                    line, command = "q", "list_page"
+                else:
+                    line, command = "", "other"
+
+                await self.think()
+                while True:
+                    sent = time.perf_counter()
+                    writer.write((line + "\n").encode("utf-8"))
+                    await writer.drain()
+                    reply = await self._receive(reader)
+                    self.stats.record(command, time.perf_counter() - sent)
+                    if reply.get("error") != "busy":
+                        break
+                    # Session could not be restored yet; send the line again
+                    self.stats.rejected += 1
+                    await self._back_off(reply)
+        finally:
+            writer.close()
+
+    async def _back_off(self, reply: Dict) -> None:
+        remaining = self.deadline - time.monotonic()
+        await asyncio.sleep(max(0.0, min(reply.get("retry_after", 1.0), remaining)))
+
+    async def _receive(self, reader: asyncio.StreamReader) -> Dict:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError("server closed the connection")
+        return json.loads(line)
+
+
+async def run_load(args, stats: Stats) -> float:
+    started = time.monotonic()
+    deadline = started + args.duration
+    master = random.Random(args.seed)
+
+    async def start_player(index: int) -> None:
+        # Ramp: linear spreads starts over --ramp-seconds, step starts
+        # players in four equal waves, none starts everyone at once
+        if args.ramp == "linear":
+            delay = args.ramp_seconds * index / args.players
+        elif args.ramp == "step":
+            delay = args.ramp_seconds * (index * 4 // args.players) / 4
+        else:
+            delay = 0.0
+        await asyncio.sleep(delay)
+        await Player(args, stats, random.Random(master.random()), deadline).run()
+
+    await asyncio.gather(*(start_player(i) for i in range(args.players)))
+    return time.monotonic() - started
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(args) -> subprocess.Popen:
+    """Start `python -m server` in a scratch directory and wait for it"""
+    workdir = tempfile.mkdtemp(prefix="loadgen_")
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    command = [sys.executable, "-m", "server", "--port", str(args.port)]
+    command += args.server_args
+    process = subprocess.Popen(
+        command,
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    process.workdir = workdir
+
+    for _ in range(200):
+        try:
+            socket.create_connection((args.host, args.port), timeout=0.5).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("server did not start listening")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load generator for server mode")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument(
+        "--spawn", action="store_true", help="start a local server on a free port"
+    )
+    parser.add_argument(
+        "--server-arg",
+        dest="server_args",
+        action="append",
+        default=[],
+        help="extra argument for the spawned server (repeatable)",
+    )
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument(
+        "--think-time", type=float, default=0.2, help="mean seconds between answers"
+    )
+    parser.add_argument("--ramp", choices=("none", "linear", "step"), default="linear")
+    parser.add_argument("--ramp-seconds", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        args.port = _free_port()
+        server = spawn_server(args)
+
+    stats = Stats()
+    try:
+        elapsed = asyncio.run(run_load(args, stats))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+            shutil.rmtree(server.workdir, ignore_errors=True)
+
+    config = {
+        k: v for k, v in vars(args).items() if k not in ("output", "server_args")
+    }
+    report = json.dumps(stats.report(elapsed, config), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
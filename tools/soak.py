@@ -0,0 +1,356 @@
+"""Long-running soak test for memory growth and latency drift
+
+Run from the repository root:
+
+    python -m tools.soak --duration 3600 --interval 30 --output soak.json
+    python -m tools.soak --duration 600 --evict-finished --max-rss-per-turn 256
+
+Scripted sessions (the tools.loadgen plans of number and word games,
+/status, /pause and an interrupted game, plus the /resume and /load swaps
+a server turns off) are driven back to back through create_game_system in
+streaming mode, in a scratch directory, for --duration seconds. Every
+--interval seconds the run samples resident memory, tracemalloc totals,
+graph threads held by the checkpointer, saved sessions on disk and the
+latency of the turns since the last sample.
+With tracing on, the report also lists the source lines whose allocations
+grew most between the end of the warm-up and the end of the run.
+
+After the run a least-squares trend is fitted over the samples past the
+warm-up: memory growth per turn and the relative drift of mean turn latency.
+The run fails (exit status 1) when either is over its threshold. The JSON
+report holds the whole time series with stable keys and rounding, so two
+builds can be compared with a plain diff.
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from tools import loadgen
+from tools.loadgen import GUESS, REPO_ROOT, WORD_GUESS, WORDS
+
+# The loadgen plans plus the swaps it cannot send to a server: soak drives
+# a local graph, where /resume and /load are on
+STEPS = loadgen.STEPS + ("/resume", "/load")
+
+
+def _fit(xs: Sequence[float], ys: Sequence[float]) -> Tuple[float, float]:
+    """Least-squares (slope, intercept) of ys against xs"""
+    n = len(xs)
+    if n < 2:
+        return 0.0, (ys[0] if ys else 0.0)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var = sum((x - mean_x) ** 2 for x in xs)
+    if not var:
+        return 0.0, mean_y
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+    return slope, mean_y - slope * mean_x
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class ScriptedSession:
+    """Plays one planned session through the graph, timing every turn"""
+
+    def __init__(self, graph, rng: random.Random, thread_id: str):
+        self.graph = graph
+        self.rng = rng
+        self.config = {"configurable": {"thread_id": thread_id}}
+        self.plan = rng.sample(STEPS, rng.randint(1, len(STEPS)))
+        self.secret = self.word = None
+        self.interrupt_pending = False
+
+    def _answer(self, prompt: str, output: str) -> str:
+        if prompt.startswith("Choice"):
+            step = self.plan.pop(0) if self.plan else ""
+            if step in ("number", "interrupt"):
+                self.secret = self.rng.randint(1, 100)
+                self.interrupt_pending = step == "interrupt"
+                return "1"
+            if step == "word":
+                return "2"
+            return step
+        if prompt.startswith("Enter 'yes'"):
+            if self.interrupt_pending:
+                self.interrupt_pending = False
+                return "quit"
+            guess = int(GUESS.findall(output)[-1])
+            if guess == self.secret:
+                return "yes"
+            return "higher" if self.secret > guess else "lower"
+        if prompt.startswith("Enter your chosen word"):
+            self.word = self.rng.choice(WORDS)
+            return self.word
+        if prompt.startswith("Answer"):
+            return self.rng.choice(("yes", "no"))
+        if prompt.startswith("Was I correct"):
+            guessed = WORD_GUESS.findall(output)
+            return "yes" if guessed and guessed[-1] == self.word else "no"
+        if prompt.startswith("Choose (1-3)"):
+            return "3"
+        if prompt.startswith("Enter session number"):
+            return "1"
+        if prompt.startswith("-- more --"):
+            return "q"
+        return ""
+
+    def turns(self, initial_state: Dict):
+        """Run the session, yielding the seconds each turn took"""
+        from game import reset_output_sink, set_output_sink, stream_turn
+        from langgraph.types import Command
+
+        payload = initial_state
+        while True:
+            buffer = io.StringIO()
+            token = set_output_sink(buffer)
+            started = time.perf_counter()
+            try:
+                prompt = stream_turn(self.graph, payload, self.config)
+            finally:
+                reset_output_sink(token)
+            yield time.perf_counter() - started
+            if prompt is None:
+                return
+            payload = Command(resume=self._answer(prompt, buffer.getvalue()))
+
+
+class Soak:
+    """Drives sessions until the deadline and records periodic samples"""
+
+    def __init__(self, args):
+        from game import create_game_system
+        from storage import SessionJournal, SessionStore
+
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.journal = SessionJournal(os.path.join("checkpoints", "journal"))
+        self.graph = create_game_system(streaming=True, journal=self.journal)
+        self.store = SessionStore("checkpoints")
+        self.samples: List[Dict[str, float]] = []
+        self.turns = 0
+        self.sessions = 0
+        self._latencies: List[float] = []
+        self._baseline = None
+        self.warmup_s = args.warmup * args.duration
+        self.top_growth: List[Dict] = []
+
+    def sample(self, elapsed: float) -> None:
+        from server.admission import resident_bytes
+
+        heap, heap_peak = (
+            tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        )
+        latencies = self._latencies
+        self._latencies = []
+        self.samples.append(
+            {
+                "elapsed_s": round(elapsed, 1),
+                "turns": self.turns,
+                "sessions": self.sessions,
+                "rss_bytes": resident_bytes() or 0,
+                "heap_bytes": heap,
+                "heap_peak_bytes": heap_peak,
+                "graph_threads": len(getattr(self.graph.checkpointer, "storage", {})),
+                "saved_sessions": sum(1 for _ in self.store.entries()),
+                "latency_mean_ms": round(
+                    sum(latencies) / len(latencies) * 1000 if latencies else 0.0, 3
+                ),
+                "latency_p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+                "latency_p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+            }
+        )
+
+    def run(self) -> None:
+        from game import new_session_state
+
+        started = time.monotonic()
+        deadline = started + self.args.duration
+        next_sample = started
+        while time.monotonic() < deadline:
+            state = new_session_state()
+            session = ScriptedSession(self.graph, self.rng, state["session_id"])
+            for seconds in session.turns(state):
+                self.turns += 1
+                self._latencies.append(seconds)
+                now = time.monotonic()
+                if now >= next_sample:
+                    if (
+                        self._baseline is None
+                        and tracemalloc.is_tracing()
+                        and now - started >= self.warmup_s
+                    ):
+                        # Before the first sample the trend is fitted from,
+                        # so the snapshot's own memory does not read as growth
+                        self._baseline = tracemalloc.take_snapshot()
+                    self.sample(now - started)
+                    next_sample = now + self.args.interval
+            self.sessions += 1
+            # A scripted /resume or /load swaps another session_id in; the
+            # journal of the one it ended as and the one it started as are
+            # both finished
+            final = self.graph.get_state(session.config).values
+            for session_id in {state["session_id"], final.get("session_id")} - {None}:
+                self.journal.close(session_id)
+            if self.args.evict_finished:
+                # The graph thread stays keyed by the id the session started with
+                self.graph.checkpointer.delete_thread(
+                    session.config["configurable"]["thread_id"]
+                )
+        self.sample(time.monotonic() - started)
+        self.journal.shutdown()
+        if self._baseline is not None:
+            self.top_growth = self._growth(tracemalloc.take_snapshot())
+
+    def _growth(self, snapshot) -> List[Dict]:
+        """Allocation sites that grew most since the warm-up snapshot"""
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diffs = snapshot.filter_traces(ignore).compare_to(
+            self._baseline.filter_traces(ignore), "lineno"
+        )
+        return [
+            {
+                "site": str(diff.traceback),
+                "size_diff_bytes": diff.size_diff,
+                "count_diff": diff.count_diff,
+            }
+            for diff in diffs[: self.args.top]
+            if diff.size_diff > 0
+        ]
+
+    def trends(self) -> Dict[str, float]:
+        """Per-turn growth and latency drift fitted past the warm-up"""
+        window = [s for s in self.samples if s["elapsed_s"] >= self.warmup_s]
+        turns = [s["turns"] for s in window]
+
+        trends = {}
+        for key in ("rss_bytes", "heap_bytes", "graph_threads", "saved_sessions"):
+            slope, _ = _fit(turns, [s[key] for s in window])
+            trends[f"{key}_per_turn"] = round(slope, 4)
+
+        timed = [s for s in window if s["latency_mean_ms"]]
+        slope, intercept = _fit(
+            [s["turns"] for s in timed], [s["latency_mean_ms"] for s in timed]
+        )
+        trends["latency_ms_per_1k_turns"] = round(slope * 1000, 4)
+        drift = 0.0
+        if len(timed) >= 2:
+            first = intercept + slope * timed[0]["turns"]
+            last = intercept + slope * timed[-1]["turns"]
+            drift = (last - first) / first if first > 0 else 0.0
+        trends["latency_drift"] = round(drift, 4)
+        return trends
+
+    def failures(self, trends: Dict[str, float]) -> List[str]:
+        args = self.args
+        checks = (
+            ("rss_bytes_per_turn", args.max_rss_per_turn, "bytes/turn"),
+            ("heap_bytes_per_turn", args.max_heap_per_turn, "bytes/turn"),
+            ("latency_drift", args.max_latency_drift, "relative"),
+        )
+        failed = []
+        for key, limit, unit in checks:
+            if limit is not None and trends[key] > limit:
+                failed.append(f"{key} {trends[key]} over {limit} {unit}")
+        return failed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Soak test for memory and latency")
+    parser.add_argument("--duration", type=float, default=600.0, help="seconds to run")
+    parser.add_argument(
+        "--interval", type=float, default=10.0, help="seconds between samples"
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=0.2,
+        help="fraction of the run left out of the trend fit",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--evict-finished",
+        action="store_true",
+        help="drop finished sessions from the graph checkpointer, as server mode does",
+    )
+    parser.add_argument(
+        "--no-tracemalloc",
+        dest="tracemalloc",
+        action="store_false",
+        help="skip Python heap tracing (lower overhead, no heap_bytes)",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="allocation growth sites to report"
+    )
+    parser.add_argument("--max-rss-per-turn", type=float, default=1024.0)
+    parser.add_argument("--max-heap-per-turn", type=float, default=1024.0)
+    parser.add_argument(
+        "--max-latency-drift",
+        type=float,
+        default=0.5,
+        help="allowed relative rise of fitted mean turn latency over the run",
+    )
+    parser.add_argument("--workdir", help="run here instead of a scratch directory")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output) if args.output else None
+    # The run changes directory; keep the game importable from here
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="soak_")
+    os.makedirs(workdir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    try:
+        soak = Soak(args)
+        soak.run()
+    finally:
+        tracemalloc.stop()
+        os.chdir(cwd)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    trends = soak.trends()
+    failures = soak.failures(trends)
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "workdir")}
+    report = {
+        "config": config,
+        "turns": soak.turns,
+        "sessions": soak.sessions,
+        "trends": trends,
+        "failures": failures,
+        "passed": not failures,
+        "top_growth": soak.top_growth,
+        "samples": soak.samples,
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,422 @@
+"""Parallel self-play tournament of game strategies against oracles
+
+Run from the repository root:
+
+    python -m tools.tournament --games 1000000 --workers 8
+    python -m tools.tournament --game number --games 200000 \
+        --number-agent agents.number_game_agent:NumberGameAgent \
+        --number-agent my_strategies:TernaryNumberAgent
+
+Every match calls the real agent's play() with an oracle in place of the
+player: the oracle is the match's input provider and output sink, so it
+answers each prompt from the secret it holds and the agent's printing goes
+nowhere. Matches are cut into chunks that idle worker processes pull from
+a shared queue, so a slow chunk never holds up the rest.
+
+Match i of a game uses a seed derived from --seed, the game and i only, so
+results do not depend on the worker count or chunking, and every strategy
+given for a game plays exactly the same secrets. Chunks return integer
+tallies that are merged as they arrive; the JSON report gives each
+strategy's win rate and turns per game with confidence intervals, and for
+every strategy after the first, the paired difference from the first.
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+from tools.loadgen import GUESS, REPO_ROOT, WORD_GUESS, WORDS
+
+DEFAULT_AGENTS = {
+    "number": "agents.number_game_agent:NumberGameAgent",
+    "word": "agents.word_game_agent:WordGameAgent",
+}
+
+WINS_KEY = {"number": "number_wins", "word": "word_wins"}
+
+# Ground truth the word oracle answers questions from
+QUESTIONS = (
+    "Is it a living thing?",
+    "Is it bigger than a breadbox?",
+    "Can you hold it in your hand?",
+    "Is it found in nature?",
+    "Does it make sound?",
+)
+ATTRIBUTES = {
+    "apple": "nnyyn", "banana": "nnyyn", "car": "nynny", "dog": "yynyy",
+    "elephant": "yynyy", "flower": "ynyyn", "guitar": "nynny", "house": "nynnn",
+    "island": "nynyn", "jungle": "nynyy", "kite": "nyynn", "lion": "yynyy",
+    "mountain": "nynyn", "notebook": "nnynn", "ocean": "nynyy", "piano": "nynny",
+    "queen": "yynny", "robot": "nynny", "sunset": "nynyn", "tree": "yynyn",
+}  # fmt: skip
+
+
+class TurnLimit(Exception):
+    """A strategy kept asking past --max-turns; the match counts as lost"""
+
+
+class Oracle:
+    """Plays the human side of one match
+
+    Used both as the input provider and as the output sink: it keeps the
+    last line the agent printed (the guess or question being answered)
+    and counts the prompts it answers.
+    """
+
+    def __init__(self, game: str, rng: random.Random, max_turns: int):
+        self.game = game
+        self.max_turns = max_turns
+        self.turns = 0
+        self.last = ""
+        if game == "number":
+            self.secret = rng.randint(1, 100)
+        else:
+            self.secret = rng.choice(WORDS)
+
+    # -- output sink -----------------------------------------------------
+
+    def write(self, text: str) -> int:
+        if text.strip():
+            self.last = text
+        return len(text)
+
+    def flush(self):
+        pass
+
+    # -- input provider --------------------------------------------------
+
+    def __call__(self, prompt: str) -> str:
+        self.turns += 1
+        if self.turns > self.max_turns:
+            raise TurnLimit(prompt)
+        if prompt.startswith("Enter 'yes'"):
+            guess = GUESS.search(self.last)
+            if guess is None:
+                return ""
+            guess = int(guess.group(1))
+            if guess == self.secret:
+                return "yes"
+            return "higher" if self.secret > guess else "lower"
+        if prompt.startswith("Enter your chosen word"):
+            return self.secret
+        if prompt.startswith("Answer"):
+            question = self.last.strip()
+            if question not in QUESTIONS:
+                return "maybe"
+            truth = ATTRIBUTES[self.secret][QUESTIONS.index(question)]
+            return "yes" if truth == "y" else "no"
+        if prompt.startswith("Was I correct"):
+            guessed = WORD_GUESS.search(self.last)
+            return "yes" if guessed and guessed.group(1) == self.secret else "no"
+        return ""
+
+
+class Tally:
+    """Exact integer totals for one strategy (or one paired difference)"""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        # Equal to wins for a strategy; the spread of a paired difference
+        self.wins_sq = 0
+        self.capped = 0
+        self.turns = 0
+        self.turns_sq = 0
+        self.histogram: Counter = Counter()
+
+    def add(self, won: int, turns: int, capped: bool = False) -> None:
+        self.games += 1
+        self.wins += won
+        self.wins_sq += won * won
+        self.capped += capped
+        self.turns += turns
+        self.turns_sq += turns * turns
+        self.histogram[turns] += 1
+
+    def merge(self, other: "Tally") -> None:
+        self.games += other.games
+        self.wins += other.wins
+        self.wins_sq += other.wins_sq
+        self.capped += other.capped
+        self.turns += other.turns
+        self.turns_sq += other.turns_sq
+        self.histogram.update(other.histogram)
+
+
+def _mean_interval(total: int, total_sq: int, n: int, z: float) -> Dict[str, float]:
+    """Mean with a normal-approximation confidence interval"""
+    if not n:
+        return {"mean": 0.0, "low": 0.0, "high": 0.0}
+    mean = total / n
+    var = max(0.0, (total_sq - total * total / n) / (n - 1)) if n > 1 else 0.0
+    half = z * (var / n) ** 0.5
+    return {
+        "mean": round(mean, 6),
+        "low": round(mean - half, 6),
+        "high": round(mean + half, 6),
+    }
+
+
+def _wilson(wins: int, n: int, z: float) -> Dict[str, float]:
+    """Win rate with a Wilson score interval"""
+    if not n:
+        return {"rate": 0.0, "low": 0.0, "high": 0.0}
+    p = wins / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * ((p * (1 - p) + z * z / (4 * n)) / n) ** 0.5 / denom
+    return {
+        "rate": round(p, 6),
+        "low": round(centre - half, 6),
+        "high": round(centre + half, 6),
+    }
+
+
+def load_agent(spec: str):
+    """Instantiate the agent class named by 'module:Class'"""
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)()
+
+
+def play_match(
+    game: str, agent, seed: int, index: int, max_turns: int
+) -> Tuple[int, int, bool]:
+    """One game of agent against a fresh oracle; returns (won, turns, capped)"""
+    from agents import reset_input_provider, set_input_provider
+    from game import reset_output_sink, set_output_sink
+
+    oracle = Oracle(game, random.Random(f"{seed}:{game}:{index}"), max_turns)
+    state = {
+        # Fixed per match, so strategies that seed from it stay paired
+        "session_id": f"tournament-{game}-{index}",
+        "action": f"{game}_game",
+        "current_game": game,
+        "number_games_played": 0,
+        "word_games_played": 0,
+        "number_wins": 0,
+        "word_wins": 0,
+        "interrupted": False,
+        "resumable": False,
+    }
+    sink = set_output_sink(oracle)
+    provider = set_input_provider(oracle)
+    try:
+        state = agent.play(state)
+    except TurnLimit:
+        return 0, max_turns, True
+    finally:
+        reset_input_provider(provider)
+        reset_output_sink(sink)
+    return int(state.get(WINS_KEY[game], 0) > 0), oracle.turns, False
+
+
+# Per worker process: game -> agents, in the order given on the command line
+_agents: Dict[str, list] = {}
+_settings: Dict[str, int] = {}
+
+
+def _init_worker(strategies: Dict[str, List[str]], seed: int, max_turns: int) -> None:
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    for game, specs in strategies.items():
+        _agents[game] = [load_agent(spec) for spec in specs]
+    _settings.update(seed=seed, max_turns=max_turns)
+
+
+def play_chunk(task: Tuple[str, int, int]):
+    """Play matches [start, stop) of a game with every strategy
+
+    Returns the game, a tally per strategy and, for each strategy after the
+    first, a tally of its per-match difference from the first.
+    """
+    game, start, stop = task
+    agents = _agents[game]
+    seed, max_turns = _settings["seed"], _settings["max_turns"]
+    tallies = [Tally() for _ in agents]
+    diffs = [Tally() for _ in agents[1:]]
+    for index in range(start, stop):
+        results = [play_match(game, agent, seed, index, max_turns) for agent in agents]
+        for tally, (won, turns, capped) in zip(tallies, results):
+            tally.add(won, turns, capped)
+        base_won, base_turns, _ = results[0]
+        for diff, (won, turns, _) in zip(diffs, results[1:]):
+            diff.add(won - base_won, turns - base_turns)
+    return game, tallies, diffs
+
+
+class Tournament:
+    """Schedules chunks over the pool and merges their tallies as they land"""
+
+    def __init__(self, args, strategies: Dict[str, List[str]]):
+        self.args = args
+        self.strategies = strategies
+        self.z = NormalDist().inv_cdf(0.5 + args.confidence / 2)
+        self.tallies = {
+            game: [Tally() for _ in specs] for game, specs in strategies.items()
+        }
+        self.diffs = {
+            game: [Tally() for _ in specs[1:]] for game, specs in strategies.items()
+        }
+        self.played = 0
+        self.elapsed = 0.0
+
+    def tasks(self):
+        for game in self.strategies:
+            for start in range(0, self.args.games, self.args.chunk):
+                yield game, start, min(start + self.args.chunk, self.args.games)
+
+    def run(self) -> None:
+        args = self.args
+        initargs = (self.strategies, args.seed, args.max_turns)
+        started = time.monotonic()
+        next_progress = started + args.progress
+        total = args.games * len(self.strategies)
+
+        if args.workers <= 1:
+            _init_worker(*initargs)
+            results = map(play_chunk, self.tasks())
+            pool = None
+        else:
+            pool = multiprocessing.Pool(args.workers, _init_worker, initargs)
+            results = pool.imap_unordered(play_chunk, self.tasks())
+        try:
+            for game, tallies, diffs in results:
+                merged = self.tallies[game] + self.diffs[game]
+                for merged_tally, tally in zip(merged, tallies + diffs):
+                    merged_tally.merge(tally)
+                self.played += tallies[0].games
+                now = time.monotonic()
+                if args.progress and now >= next_progress:
+                    rate = self.played / (now - started)
+                    print(
+                        f"{self.played}/{total} matches, {rate:.0f}/s",
+                        file=sys.stderr,
+                    )
+                    next_progress = now + args.progress
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        self.elapsed = time.monotonic() - started
+
+    def _summary(self, tally: Tally) -> Dict:
+        return {
+            "games": tally.games,
+            "win_rate": _wilson(tally.wins, tally.games, self.z),
+            "turns": _mean_interval(tally.turns, tally.turns_sq, tally.games, self.z),
+            "turns_max": max(tally.histogram, default=0),
+            "capped": tally.capped,
+            "turns_histogram": {str(k): v for k, v in sorted(tally.histogram.items())},
+        }
+
+    def report(self) -> Dict:
+        games = {}
+        for game, specs in self.strategies.items():
+            entries = []
+            for i, spec in enumerate(specs):
+                entry = {"agent": spec, **self._summary(self.tallies[game][i])}
+                if i:
+                    diff = self.diffs[game][i - 1]
+                    entry["vs_baseline"] = {
+                        "win_rate": _mean_interval(
+                            diff.wins, diff.wins_sq, diff.games, self.z
+                        ),
+                        "turns": _mean_interval(
+                            diff.turns, diff.turns_sq, diff.games, self.z
+                        ),
+                    }
+                entries.append(entry)
+            games[game] = entries
+        return games
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Self-play tournament of game strategies"
+    )
+    parser.add_argument(
+        "--game",
+        action="append",
+        choices=sorted(DEFAULT_AGENTS),
+        help="game to play (repeatable; default both)",
+    )
+    parser.add_argument("--games", type=int, default=10000, help="matches per game")
+    parser.add_argument(
+        "--number-agent",
+        action="append",
+        metavar="MODULE:CLASS",
+        help="number game strategy (repeatable; the first is the baseline)",
+    )
+    parser.add_argument(
+        "--word-agent",
+        action="append",
+        metavar="MODULE:CLASS",
+        help="word game strategy (repeatable; the first is the baseline)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="worker processes"
+    )
+    parser.add_argument(
+        "--chunk", type=int, default=500, help="matches per unit of work"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--max-turns",
+        type=int,
+        default=200,
+        help="prompts a match may take before it is scored as lost",
+    )
+    parser.add_argument(
+        "--confidence", type=float, default=0.95, help="confidence level of intervals"
+    )
+    parser.add_argument(
+        "--progress",
+        type=float,
+        default=5.0,
+        help="seconds between progress lines on stderr (0 for none)",
+    )
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    chosen = {
+        "number": args.number_agent or [DEFAULT_AGENTS["number"]],
+        "word": args.word_agent or [DEFAULT_AGENTS["word"]],
+    }
+    strategies = {game: chosen[game] for game in (args.game or sorted(DEFAULT_AGENTS))}
+    # Fail on a bad MODULE:CLASS here rather than in every worker
+    for specs in strategies.values():
+        for spec in specs:
+            load_agent(spec)
+
+    tournament = Tournament(args, strategies)
+    tournament.run()
+    played, elapsed = tournament.played, tournament.elapsed
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "progress")}
+    report = {
+        "config": config,
+        "matches": played,
+        "elapsed_s": round(elapsed, 3),
+        "matches_per_s": round(played / elapsed, 1) if elapsed else 0.0,
+        "games": tournament.report(),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())